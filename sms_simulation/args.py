@@ -1,9 +1,15 @@
 import argparse
 import math
+import sys
 from typing import Dict
 from typing import List
 
+from sms_simulation.constants import PRIORITY_NAMES
 from sms_simulation.constants import SEND_SIGMA
+from sms_simulation.constants import SHUTDOWN_TIMEOUT
+from sms_simulation.fleet import load_fleet
+from sms_simulation.fleet import SenderProfiles
+from sms_simulation.trace import apply_trace_header
 
 
 # ============================================
@@ -19,22 +25,55 @@ def parse_args() -> argparse.Namespace:
 
     print(f"\nSending: {args.nMessages} messages")
     print(f"Using: {args.nSenders} senders")
-
-    messages: Dict[str, str] = {
-        "Average time to send (s) for each sender:": "timeToSend",
-        "Failure rate for each sender:": "sendFailureRate",
+    if args.backend == "thread":
+        print(f"Running senders as threads in: {args.nWorkers} worker processes")
+    if args.transport == "http":
+        print(f"Sending through the mock gateway in batches of: {args.gatewayBatch}")
+    if args.seed is not None:
+        print(f"Random seed: {args.seed}")
+    if args.record is not None:
+        print(f"Recording a trace to: {args.record}")
+    if args.replay is not None:
+        print(f"Replaying the trace: {args.replay} at {args.replaySpeed}x speed")
+    if args.priorityMix != parser.get_default("priorityMix"):
+        mix: str = ", ".join(
+            f"{name} {share:.2f}"
+            for name, share in zip(PRIORITY_NAMES, args.priorityMix)
+        )
+        print(f"Priority mix: {mix}")
+
+    if args.fleet is not None and args.replay is None:
+        print(f"Fleet: {args.fleet}")
+
+    # One line per group of identical senders rather than one per sender
+    defaultGroup: Dict[str, str | float] = {
+        "distribution": "normal",
+        "mean": parser.get_default("timeToSend"),
+        "sigma": SEND_SIGMA,
+        "failureRate": parser.get_default("sendFailureRate"),
+        "rateLimit": 0.0,
     }
 
-    for msg, attr in messages.items():
-        print(f"\n{msg}")
-        for i in range(args.nSenders):
-            if i == 5:
-                print("\t* (showing only first five)")
-                break
-            info: str = ""
-            if getattr(args, attr)[i] == parser.get_default(attr):
-                info = "(default value)"
-            print(f"\t* {getattr(args, attr)[i]} {info}")
+    print("\nSender profiles:")
+    for i, group in enumerate(args.profiles.groups()):
+        if i == 5:
+            print("\t* (showing only first five groups)")
+            break
+        count: int = group.pop("count")
+        params: str = ", ".join(
+            f"{name} {value}"
+            for name, value in group.items()
+            if name not in ("distribution", "failureRate", "rateLimit")
+        )
+        info: str = ""
+        if group["rateLimit"] > 0.0:
+            info += f", at most {group['rateLimit']} per second"
+        if group == defaultGroup:
+            info += " (default values)"
+        print(
+            f"\t* {count} x {group['distribution']} send time (s) ({params}), "
+            f"failure rate {group['failureRate']}{info}"
+        )
 
     print(f"\nUpdating progress every: {args.progUpdateTime:.2f}s\n")
 
@@ -100,6 +139,130 @@ def _get_parser() -> argparse.ArgumentParser:
         nargs="*",
     )
 
+    parser.add_argument(
+        "--fleet",
+        default=None,
+        dest="fleet",
+        metavar="PATH",
+        help="A TOML (or, if the name ends in .json, JSON) file declaring the "
+        "senders as groups, each with a count, a send-time distribution (normal, "
+        "exponential, uniform, or constant) and its parameters, a failure rate, "
+        "and, optionally, a rate limit in messages per second. Replaces -s, -t, "
+        "and -f, which cannot be given with it.",
+    )
+
+    parser.add_argument(
+        "--priority-mix",
+        default=[0.0, 1.0, 0.0],
+        type=_share_float,
+        dest="priorityMix",
+        nargs=len(PRIORITY_NAMES),
+        metavar=tuple(name.upper() for name in PRIORITY_NAMES),
+        help="The share of the messages given each priority. Each priority has "
+        "its own lane in the production queue, and the senders serve the "
+        "higher-priority lanes first while still giving the lower-priority lanes "
+        "a share so that they are never starved. The shares are normalized, so "
+        "they only need to be relative to each other.",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--backend",
+        default="process",
+        choices=["process", "thread"],
+        dest="backend",
+        help="How the senders are run. With 'process', every sender is its own "
+        "process. With 'thread', the senders are run as threads spread across "
+        "nWorkers worker processes, which uses far less memory for large numbers "
+        "of senders.",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--n-workers",
+        default=1,
+        type=_positive_int,
+        dest="nWorkers",
+        help="The number of worker processes to spread the senders across when "
+        "using the thread backend. Ignored by the process backend.",
+    )
+
+    parser.add_argument(
+        "--transport",
+        default="sleep",
+        choices=["sleep", "http"],
+        dest="transport",
+        help="How sending is simulated. With 'sleep', each sender sleeps for the "
+        "send time itself. With 'http', the senders submit the messages to a "
+        "bundled mock gateway running on localhost, which applies the send time "
+        "and failure rate on the server side. The senders use pooled keep-alive "
+        "connections, so this measures the cost of real client-side I/O.",
+    )
+
+    parser.add_argument(
+        "--gateway-batch",
+        default=1,
+        type=_positive_int,
+        dest="gatewayBatch",
+        help="The most messages a sender submits to the gateway in a single "
+        "request. Only messages that are already waiting are batched. Ignored by "
+        "the sleep transport.",
+    )
+
+    parser.add_argument(
+        "--seed",
+        default=None,
+        type=int,
+        dest="seed",
+        help="Seeds the random number generators. The producer and every sender "
+        "each get an independent stream derived from this value, so two runs with "
+        "the same seed draw the same messages, send times, and failures. If not "
+        "given, every run is different.",
+    )
+
+    traceGroup = parser.add_mutually_exclusive_group()
+
+    traceGroup.add_argument(
+        "--record",
+        default=None,
+        dest="record",
+        metavar="PATH",
+        help="Records the run to a trace file: every message produced, along "
+        "with the send time and outcome drawn for it. The trace can be replayed "
+        "with --replay.",
+    )
+
+    traceGroup.add_argument(
+        "--replay",
+        default=None,
+        dest="replay",
+        metavar="PATH",
+        help="Replays a trace recorded with --record. The recorded messages are "
+        "produced at the recorded times and sent with the recorded send times "
+        "and outcomes, through the chosen backend and transport, so runs can be "
+        "compared on exactly the same workload. The number of messages, the "
+        "senders' profiles, and the priority mix are taken from the trace.",
+    )
+
+    parser.add_argument(
+        "--replay-speed",
+        default=1.0,
+        type=_time_float,
+        dest="replaySpeed",
+        help="How many times faster than real time to replay a trace. Both the "
+        "gaps between the messages and their send times are divided by this.",
+    )
+
+    parser.add_argument(
+        "--resources",
+        action="store_true",
+        dest="resources",
+        help="Reports the CPU time, resident memory, peak resident memory, and "
+        "peak Python allocation of every process (the process manager, the "
+        "producer, each sender or worker process, the gateway, and the monitor) "
+        "at the end of the run. Tracing allocations slows the run down a little.",
+    )
+
     parser.add_argument(
         "-p",
         "--prog-update-time",
@@ -109,6 +272,56 @@ def _get_parser() -> argparse.ArgumentParser:
         help="The time, in seconds, between progress refreshes.",
     )
 
+    parser.add_argument(
+        "--timeout",
+        default=None,
+        type=_time_float,
+        dest="timeout",
+        help="The maximum time, in seconds, to wait for all of the messages to be "
+        "sent. If not given, it is derived from the number of messages and the "
+        "senders' mean send times.",
+    )
+
+    parser.add_argument(
+        "--stall-timeout",
+        default=None,
+        type=_time_float,
+        dest="stallTimeout",
+        help="Gives up if no message has been sent for this many seconds. If not "
+        "given, it is derived from the slowest sender's mean send time.",
+    )
+
+    parser.add_argument(
+        "--on-interrupt",
+        default="drain",
+        choices=["drain", "abort"],
+        dest="onInterrupt",
+        help="What to do on Ctrl-C (SIGINT) or SIGTERM. With 'drain', no new "
+        "messages are sent but the senders finish the ones they are working on. "
+        "With 'abort', every process is terminated straight away. A second signal "
+        "always aborts.",
+    )
+
+    parser.add_argument(
+        "--shutdown-timeout",
+        default=SHUTDOWN_TIMEOUT,
+        type=_time_float,
+        dest="shutdownTimeout",
+        help="The overall time, in seconds, the producer and senders are given to "
+        "exit at shutdown before they are terminated.",
+    )
+
+    parser.add_argument(
+        "--progress",
+        default="auto",
+        choices=["auto", "tty", "plain", "quiet"],
+        dest="progressMode",
+        help="How progress is displayed. 'tty' redraws the display in-place, "
+        "'plain' prints one line per update, which is better suited to logs and "
+        "pipes, and 'quiet' prints no progress at all. 'auto' uses 'tty' when "
+        "stdout is a terminal and 'plain' otherwise.",
+    )
+
     return parser
 
 
@@ -125,13 +338,51 @@ def _parse(parser: argparse.ArgumentParser) -> argparse.Namespace:
 def _validate_args(
     args: argparse.Namespace, parser: argparse.ArgumentParser
 ) -> argparse.Namespace:
-    args.timeToSend = _squeeze_list(
-        args.timeToSend, args.nSenders, parser.get_default("timeToSend")
-    )
+    # The senders' profiles come from the trace being replayed, the fleet file,
+    # or, failing those, the per-sender values given on the command line
+    if args.replay is not None:
+        try:
+            apply_trace_header(args)
+        except (OSError, ValueError, KeyError) as err:
+            parser.error(f"argument --replay: {err}")
+    elif args.fleet is not None:
+        # The fleet file declares every sender, so per-sender values given on
+        # the command line would otherwise be dropped without a word
+        conflicts: List[str] = [
+            option
+            for option, dest in (
+                ("-s/--n-senders", "nSenders"),
+                ("-t/--time-to-send", "timeToSend"),
+                ("-f/--failure-rate", "sendFailureRate"),
+            )
+            if getattr(args, dest) != parser.get_default(dest)
+        ]
+        if conflicts:
+            parser.error(f"argument --fleet: not allowed with {', '.join(conflicts)}")
+
+        try:
+            args.profiles = load_fleet(args.fleet)
+        except (OSError, ValueError) as err:
+            parser.error(f"argument --fleet: {err}")
+        args.nSenders = len(args.profiles)
+    else:
+        args.timeToSend = _squeeze_list(
+            args.timeToSend, args.nSenders, parser.get_default("timeToSend")
+        )
 
-    args.sendFailureRate = _squeeze_list(
-        args.sendFailureRate, args.nSenders, parser.get_default("sendFailureRate")
-    )
+        args.sendFailureRate = _squeeze_list(
+            args.sendFailureRate, args.nSenders, parser.get_default("sendFailureRate")
+        )
+
+        args.profiles = SenderProfiles.from_lists(args.timeToSend, args.sendFailureRate)
+
+    args.nWorkers = min(args.nWorkers, args.nSenders)
+
+    if sum(args.priorityMix) <= 0.0:
+        parser.error("argument --priority-mix: at least one share must be > 0")
+
+    if args.progressMode == "auto":
+        args.progressMode = "tty" if sys.stdout.isatty() else "plain"
 
     return args
 
@@ -236,6 +487,40 @@ def _failure_float(strValue: str) -> float:
     return value
 
 
+# ============================================
+#                _share_float
+# ============================================
+def _share_float(strValue: str) -> float:
+    """
+    Ensures that the given value can be converted to a float and
+    is >= 0. Used by ArgumentParser.
+
+    Parameters
+    ----------
+    strValue : str
+        The value of the option/argument passed on the command-line.
+
+    Returns
+    -------
+    value : float
+        The verified, float value of the given strValue.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the given value cannot be converted to a float or is < 0.
+    """
+    value: float = float(strValue)
+
+    if not math.isfinite(value):
+        raise argparse.ArgumentTypeError("Value must not be NaN or infinity.")
+
+    if value < 0.0:
+        raise argparse.ArgumentTypeError("Value must be >= 0")
+
+    return value
+
+
 # ============================================
 #               _squeeze_list
 # ============================================
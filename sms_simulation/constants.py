@@ -1,3 +1,5 @@
+from typing import Tuple
+
 # Value sent from the monitor process to each worker process to
 # indicate that the message queue has been emptied
 SENTINEL = None
@@ -10,3 +12,67 @@ SEND_SIGMA: float = 0.1
 
 # Extra time to account for overhead and deviations in the send time
 TIMEOUT_BUFFER = 5 * SEND_SIGMA
+
+# Random draws are generated in bulk blocks of this many values and then
+# handed out one at a time
+RNG_BLOCK_SIZE: int = 1024
+
+# The longest time (in seconds) the monitor blocks waiting for a response
+# before re-checking the timeout
+RESPONSE_POLL_TIME: float = 0.1
+
+# The longest time (in seconds) a worker blocks waiting for a message before
+# checking whether it has been told to stop
+QUEUE_POLL_TIME: float = 0.1
+
+# The time (in seconds) over which old samples fade out of the throughput
+# estimate, and the minimum time between samples
+THROUGHPUT_TIME_CONSTANT: float = 5.0
+THROUGHPUT_SAMPLE_TIME: float = 0.25
+
+# The timeout derived from the sender profiles allows for the run taking
+# this many times longer than expected
+DEADLINE_SAFETY_FACTOR: float = 2.0
+
+# Time (in seconds) allowed for the producer and sender processes to start
+STARTUP_ALLOWANCE: float = 5.0
+
+# The shortest stall timeout (in seconds) derived from the sender profiles
+STALL_TIMEOUT_FLOOR: float = 10.0
+
+# The time (in seconds) processes are given to exit after being terminated
+# before they are killed
+KILL_GRACE_TIME: float = 1.0
+
+# The default overall time (in seconds) the processes are given to exit on
+# their own at shutdown
+SHUTDOWN_TIMEOUT: float = 5.0
+
+# Message priorities, highest first. Each priority has its own lane in the
+# production queue
+PRIORITY_NAMES: Tuple[str, ...] = ("high", "normal", "bulk")
+
+# The number of slots in the senders' dequeue schedule that prefer each lane.
+# When every lane is backed up, the lanes are served in these proportions
+LANE_WEIGHTS: Tuple[int, ...] = (8, 3, 1)
+
+# The time (in seconds) a sender waits before looking through the lanes again
+# for a message that it has been promised but that has not shown up yet
+LANE_POLL_TIME: float = 0.001
+
+# Where the mock gateway listens. It always runs on the local machine
+GATEWAY_HOST: str = "127.0.0.1"
+GATEWAY_PATH: str = "/send"
+
+# The time (in seconds) the mock gateway is given to start listening
+GATEWAY_START_TIMEOUT: float = 10.0
+
+# The version of the trace file format written by --record
+TRACE_VERSION: int = 2
+
+# With more senders (or worker processes) than this, the resource usage report
+# summarizes them instead of listing each one
+MAX_USAGE_ROWS: int = 5
+
+# The distributions a sender's send times can be drawn from in a fleet file
+SEND_DISTRIBUTIONS: Tuple[str, ...] = ("normal", "exponential", "uniform", "constant")
@@ -0,0 +1,445 @@
+import array
+import bisect
+import itertools
+import json
+import math
+import tomllib
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Sequence
+from typing import Tuple
+
+from sms_simulation.constants import SEND_DISTRIBUTIONS
+from sms_simulation.constants import SEND_SIGMA
+from sms_simulation.rng import BlockSampler
+
+# The parameters of each send-time distribution, as named in a fleet file, and
+# their defaults. Every profile stores exactly two parameters
+_PARAMS: Dict[str, Tuple[Tuple[str, float | None], ...]] = {
+    "normal": (("mean", None), ("sigma", SEND_SIGMA)),
+    "exponential": (("mean", None),),
+    "uniform": (("low", None), ("high", None)),
+    "constant": (("mean", None),),
+}
+
+_GROUP_KEYS: Tuple[str, ...] = ("count", "distribution", "failureRate", "rateLimit")
+
+
+# ============================================
+#                SenderProfile
+# ============================================
+class SenderProfile(NamedTuple):
+    """
+    How a single sender behaves.
+
+    Parameters
+    ----------
+    distribution : str
+        The distribution the send times are drawn from. One of
+        SEND_DISTRIBUTIONS.
+
+    params : Tuple[float, float]
+        The distribution's parameters: (mean, sigma) for normal, (low, high)
+        for uniform, and (mean, 0) for exponential and constant. Normal draws
+        are folded at zero, as a send cannot take negative time.
+
+    failureRate : float
+        The chance (as a decimal between 0.0 and 1.) that any given send fails.
+
+    rateLimit : float
+        The most messages the sender may send per second. 0 means no limit.
+    """
+
+    distribution: str
+    params: Tuple[float, float]
+    failureRate: float
+    rateLimit: float
+
+    # -----
+    # draw
+    # -----
+    def draw(self, sampler: BlockSampler) -> Tuple[float, bool]:
+        """
+        Draws the time taken by a single send and whether it succeeded.
+
+        Parameters
+        ----------
+        sampler : BlockSampler
+            The source of random draws owned by the sender.
+
+        Returns
+        -------
+        sendTime : float
+            The number of seconds the send takes.
+
+        successful : bool
+            Whether the send succeeded.
+        """
+        first, second = self.params
+        sendTime: float = first
+
+        if self.distribution == "normal":
+            sendTime = math.fabs(first + second * sampler.gauss())
+        elif self.distribution == "exponential":
+            sendTime = -first * math.log(1.0 - sampler.uniform())
+        elif self.distribution == "uniform":
+            sendTime = first + (second - first) * sampler.uniform()
+
+        return sendTime, sampler.uniform() > self.failureRate
+
+    # -----
+    # mean_time
+    # -----
+    def mean_time(self) -> float:
+        """
+        The mean number of seconds the sender spends on each message, allowing
+        for its rate limit.
+        """
+        first, second = self.params
+        mean: float = first
+
+        if self.distribution == "normal" and second > 0.0:
+            # The mean of the folded normal distribution
+            mean = second * math.sqrt(2.0 / math.pi) * math.exp(
+                -(first**2) / (2.0 * second**2)
+            ) + first * math.erf(first / (second * math.sqrt(2.0)))
+        elif self.distribution == "uniform":
+            mean = (first + second) / 2.0
+
+        return max(mean, self._min_interval())
+
+    # -----
+    # slow_time
+    # -----
+    def slow_time(self) -> float:
+        """
+        A time, in seconds, that the sender will only rarely take over a
+        single message, allowing for its rate limit.
+        """
+        first, second = self.params
+        slow: float = first
+
+        if self.distribution == "normal":
+            slow = first + 3.0 * second
+        elif self.distribution == "exponential":
+            # The 99th percentile
+            slow = first * math.log(100.0)
+        elif self.distribution == "uniform":
+            slow = second
+
+        return max(slow, self._min_interval())
+
+    # -----
+    # _min_interval
+    # -----
+    def _min_interval(self) -> float:
+        return 1.0 / self.rateLimit if self.rateLimit > 0.0 else 0.0
+
+
+# ============================================
+#               SenderProfiles
+# ============================================
+class SenderProfiles:
+    """
+    The profiles of every sender in the fleet.
+
+    The fleet is made up of groups of identical senders, and only one row per
+    group is stored, in flat arrays. The profile of any one sender is built on
+    demand by finding its group, so the table stays the same size however many
+    senders there are, and is cheap to hand to every worker process.
+
+    Parameters
+    ----------
+    groups : Sequence[Dict[str, Any]]
+        One entry per group, in sender order, as read from a fleet file. Each
+        holds the number of senders in the group ("count"), the send-time
+        distribution and its parameters, the failure rate ("failureRate"), and,
+        optionally, the rate limit ("rateLimit").
+
+    Raises
+    ------
+    ValueError
+        If a group is malformed.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, groups: Sequence[Dict[str, Any]]) -> None:
+        if not groups:
+            raise ValueError("the fleet has no sender groups.")
+
+        # The index one past the last sender in each group
+        self._ends: array.array = array.array("q")
+        self._distributions: array.array = array.array("b")
+        self._params: array.array = array.array("d")
+        self._failureRates: array.array = array.array("d")
+        self._rateLimits: array.array = array.array("d")
+
+        end: int = 0
+
+        for i, group in enumerate(groups):
+            count, profile = _parse_group(group, i)
+            end += count
+            self._ends.append(end)
+            self._distributions.append(SEND_DISTRIBUTIONS.index(profile.distribution))
+            self._params.extend(profile.params)
+            self._failureRates.append(profile.failureRate)
+            self._rateLimits.append(profile.rateLimit)
+
+    # -----
+    # from_lists
+    # -----
+    @classmethod
+    def from_lists(
+        cls, timeToSend: List[float], sendFailureRate: List[float]
+    ) -> "SenderProfiles":
+        """
+        Builds the profiles from the per-sender mean send times and failure
+        rates given on the command line. Runs of senders with the same values
+        share a group.
+
+        Parameters
+        ----------
+        timeToSend : List[float]
+            The mean send time of each sender.
+
+        sendFailureRate : List[float]
+            The failure rate of each sender.
+
+        Returns
+        -------
+        SenderProfiles
+            Normally distributed send times with a standard deviation of
+            SEND_SIGMA and no rate limits.
+        """
+        return cls(
+            [
+                {
+                    "count": len(list(run)),
+                    "distribution": "normal",
+                    "mean": t,
+                    "sigma": SEND_SIGMA,
+                    "failureRate": f,
+                }
+                for (t, f), run in itertools.groupby(zip(timeToSend, sendFailureRate))
+            ]
+        )
+
+    # -----
+    # __len__
+    # -----
+    def __len__(self) -> int:
+        """
+        The number of senders in the fleet.
+        """
+        return self._ends[-1]
+
+    # -----
+    # __getitem__
+    # -----
+    def __getitem__(self, senderIndex: int) -> SenderProfile:
+        """
+        The profile of the given sender.
+        """
+        if not 0 <= senderIndex < len(self):
+            raise IndexError(f"no sender {senderIndex} in a fleet of {len(self)}")
+
+        return self._profile(bisect.bisect_right(self._ends, senderIndex))
+
+    # -----
+    # iter_groups
+    # -----
+    def iter_groups(self) -> Iterator[Tuple[int, SenderProfile]]:
+        """
+        Yields the number of senders in each group along with their profile.
+        """
+        start: int = 0
+
+        for group, end in enumerate(self._ends):
+            yield end - start, self._profile(group)
+            start = end
+
+    # -----
+    # groups
+    # -----
+    def groups(self) -> List[Dict[str, Any]]:
+        """
+        The groups in the same form as they are given to the constructor.
+        """
+        groups: List[Dict[str, Any]] = []
+
+        for count, profile in self.iter_groups():
+            group: Dict[str, Any] = {
+                "count": count,
+                "distribution": profile.distribution,
+            }
+            for (name, _), value in zip(_PARAMS[profile.distribution], profile.params):
+                group[name] = value
+            group["failureRate"] = profile.failureRate
+            group["rateLimit"] = profile.rateLimit
+            groups.append(group)
+
+        return groups
+
+    # -----
+    # scaled
+    # -----
+    def scaled(self, speed: float) -> "SenderProfiles":
+        """
+        The same fleet running the given number of times faster: every send
+        time is divided by speed and every rate limit multiplied by it.
+        """
+        groups: List[Dict[str, Any]] = self.groups()
+
+        for group in groups:
+            for name, _ in _PARAMS[group["distribution"]]:
+                group[name] /= speed
+            group["rateLimit"] *= speed
+
+        return SenderProfiles(groups)
+
+    # -----
+    # _profile
+    # -----
+    def _profile(self, group: int) -> SenderProfile:
+        return SenderProfile(
+            SEND_DISTRIBUTIONS[self._distributions[group]],
+            (self._params[2 * group], self._params[2 * group + 1]),
+            self._failureRates[group],
+            self._rateLimits[group],
+        )
+
+
+# ============================================
+#                 load_fleet
+# ============================================
+def load_fleet(path: str) -> SenderProfiles:
+    """
+    Reads a fleet file. Files ending in .json are read as JSON and anything
+    else as TOML. Either way, the file holds a list of groups under the key
+    "group", i.e., a [[group]] table per group in TOML.
+
+    Parameters
+    ----------
+    path : str
+        The fleet file.
+
+    Returns
+    -------
+    SenderProfiles
+        The profiles of every sender in the fleet.
+
+    Raises
+    ------
+    ValueError
+        If the file cannot be parsed or a group is malformed.
+    """
+    with open(path, "rb") as fleetFile:
+        if path.endswith(".json"):
+            spec: Dict[str, Any] = json.load(fleetFile)
+        else:
+            spec = tomllib.load(fleetFile)
+
+    if not isinstance(spec, dict) or not isinstance(spec.get("group"), list):
+        raise ValueError(f"{path} does not have a list of sender groups.")
+
+    return SenderProfiles(spec["group"])
+
+
+# ============================================
+#                _parse_group
+# ============================================
+def _parse_group(group: Dict[str, Any], index: int) -> Tuple[int, SenderProfile]:
+    """
+    Checks a single group from a fleet and builds its profile.
+
+    Parameters
+    ----------
+    group : Dict[str, Any]
+        The group, as described in SenderProfiles.
+
+    index : int
+        The position of the group in the fleet, for error messages.
+
+    Returns
+    -------
+    count : int
+        The number of senders in the group.
+
+    profile : SenderProfile
+        The profile shared by the group's senders.
+
+    Raises
+    ------
+    ValueError
+        If the group is malformed.
+    """
+    where: str = f"sender group {index + 1}"
+
+    if not isinstance(group, dict):
+        raise ValueError(f"{where}: must be a table of settings.")
+
+    distribution: Any = group.get("distribution", "normal")
+
+    if distribution not in _PARAMS:
+        raise ValueError(
+            f"{where}: distribution must be one of {', '.join(SEND_DISTRIBUTIONS)}."
+        )
+
+    unknown: List[str] = [
+        key
+        for key in group
+        if key not in _GROUP_KEYS and key not in dict(_PARAMS[distribution])
+    ]
+    if unknown:
+        raise ValueError(f"{where}: unknown setting(s) {', '.join(unknown)}.")
+
+    count: Any = group.get("count")
+    if not isinstance(count, int) or isinstance(count, bool) or count <= 0:
+        raise ValueError(f"{where}: count must be an integer > 0.")
+
+    params: List[float] = []
+    for name, default in _PARAMS[distribution]:
+        value: Any = group.get(name, default)
+        if value is None:
+            raise ValueError(f"{where}: {distribution} needs a value for {name}.")
+        params.append(_check_number(value, 0.0, math.inf, f"{where}: {name}"))
+    params += [0.0] * (2 - len(params))
+
+    if distribution == "uniform" and params[0] > params[1]:
+        raise ValueError(f"{where}: low must not be greater than high.")
+
+    profile: SenderProfile = SenderProfile(
+        distribution,
+        (params[0], params[1]),
+        _check_number(group.get("failureRate"), 0.0, 1.0, f"{where}: failureRate"),
+        _check_number(
+            group.get("rateLimit", 0.0), 0.0, math.inf, f"{where}: rateLimit"
+        ),
+    )
+
+    # It is unphysical that sending takes no time at all
+    if profile.mean_time() <= 0.0:
+        raise ValueError(f"{where}: the mean send time must be > 0.")
+
+    return count, profile
+
+
+# ============================================
+#               _check_number
+# ============================================
+def _check_number(value: Any, low: float, high: float, name: str) -> float:
+    """
+    Ensures that a setting from a fleet file is a finite number in [low, high].
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number.")
+
+    if not math.isfinite(value) or not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}.")
+
+    return float(value)
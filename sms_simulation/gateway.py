@@ -0,0 +1,322 @@
+import ctypes
+import http.client
+import http.server
+import json
+import multiprocessing as mp
+import multiprocessing.synchronize
+import queue
+import threading
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+from sms_simulation.constants import GATEWAY_HOST
+from sms_simulation.constants import GATEWAY_PATH
+from sms_simulation.fleet import SenderProfile
+from sms_simulation.resources import report_usage
+from sms_simulation.resources import start_accounting
+from sms_simulation.rng import BlockSampler
+from sms_simulation.shutdown import init_worker_signals
+
+
+# ============================================
+#                 MockGateway
+# ============================================
+class MockGateway(mp.Process):
+    """
+    A local stand-in for an SMS gateway, reached over HTTP.
+
+    Senders POST batches of messages, along with their profile (send-time
+    distribution and failure rate), and the gateway applies the latency and
+    failures on the server side before replying. Rate limits are applied by
+    the senders themselves. Every connection is kept alive and served by
+    its own thread, so the gateway can hold as many concurrent connections as
+    there are senders.
+
+    The gateway draws from one random stream per sender, derived from the seed
+    and the sender's name, so a given sender sees the same send times and
+    failures as it would without the gateway.
+
+    Parameters
+    ----------
+    port : mp.RawValue
+        Set to the port the gateway is listening on once it is ready.
+
+    readyEvent : mp.Event
+        Set once the gateway is ready to accept connections.
+
+    stopEvent : mp.Event
+        When set, the gateway shuts down.
+
+    seed : int | None
+        The seed for the whole simulation.
+
+    resourceQueue : mp.Queue | None
+        If given, the gateway's resource usage is put on this queue at exit.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self,
+        port: ctypes.c_int,
+        readyEvent: mp.synchronize.Event,
+        stopEvent: mp.synchronize.Event,
+        procName: str,
+        seed: int | None = None,
+        resourceQueue: queue.Queue | None = None,
+    ) -> None:
+        self._port: ctypes.c_int = port
+        self._readyEvent: mp.synchronize.Event = readyEvent
+        self._stopEvent: mp.synchronize.Event = stopEvent
+        self._seed: int | None = seed
+        self._resourceQueue: queue.Queue | None = resourceQueue
+
+        super().__init__(target=self._serve, name=procName)
+
+    # -----
+    # _serve
+    # -----
+    def _serve(self) -> None:
+        """
+        The target function called by the gateway process.
+        """
+        init_worker_signals()
+        start_accounting(self._resourceQueue)
+
+        server: _GatewayServer = _GatewayServer(self._seed)
+        self._port.value = server.server_address[1]
+
+        serverThread: threading.Thread = threading.Thread(
+            target=server.serve_forever, name="gateway_server"
+        )
+        serverThread.start()
+        self._readyEvent.set()
+
+        self._stopEvent.wait()
+
+        server.shutdown()
+        serverThread.join()
+        server.server_close()
+
+        report_usage(self._resourceQueue, self.name)
+
+
+# ============================================
+#               _GatewayServer
+# ============================================
+class _GatewayServer(http.server.ThreadingHTTPServer):
+    """
+    The HTTP server run by the gateway process. Holds the per-sender random
+    streams shared by the request handlers.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, seed: int | None) -> None:
+        self.seed: int | None = seed
+        self.samplers: Dict[str, BlockSampler] = {}
+        self.samplersLock: threading.Lock = threading.Lock()
+
+        super().__init__((GATEWAY_HOST, 0), _GatewayHandler)
+
+    # -----
+    # sampler
+    # -----
+    def sampler(self, senderName: str) -> BlockSampler:
+        """
+        Returns the random stream for the given sender, creating it on first
+        use.
+        """
+        with self.samplersLock:
+            if senderName not in self.samplers:
+                self.samplers[senderName] = BlockSampler(self.seed, senderName)
+            return self.samplers[senderName]
+
+
+# ============================================
+#               _GatewayHandler
+# ============================================
+class _GatewayHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Handles a single keep-alive connection to the gateway.
+    """
+
+    # Keep-alive requires HTTP/1.1
+    protocol_version = "HTTP/1.1"
+    server: _GatewayServer
+
+    # -----
+    # do_POST
+    # -----
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        if self.path != GATEWAY_PATH:
+            self.send_error(404)
+            return
+
+        length: int = int(self.headers.get("Content-Length", 0))
+        request: Dict[str, Any] = json.loads(self.rfile.read(length))
+
+        sampler: BlockSampler = self.server.sampler(request["sender"])
+        profile: SenderProfile = SenderProfile(*request["profile"])
+        results: List[Dict[str, float | bool]] = []
+
+        # A sender sends one message at a time, so a batch takes as long as
+        # its messages one after the other
+        for sms in request["messages"]:
+            # A replayed message carries the draws from the recorded run
+            if "sendTime" in sms:
+                sendTime: float = sms["sendTime"]
+                successful: bool = sms["successful"]
+            else:
+                sendTime, successful = profile.draw(sampler)
+
+            time.sleep(sendTime)
+            results.append({"successful": successful, "timeToSend": sendTime})
+
+        body: bytes = json.dumps(results).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # -----
+    # log_message
+    # -----
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        # Keep the progress display clean
+        return
+
+
+# ============================================
+#                GatewayClient
+# ============================================
+class GatewayClient:
+    """
+    Submits messages to the mock gateway over a pool of keep-alive connections.
+
+    A connection is taken from the pool for each submit and put back after, so
+    the threads of a sender pool share connections instead of each opening its
+    own, and no connection is set up more than once. A connection that has
+    gone bad is dropped and the submit is retried once on a fresh one.
+
+    Parameters
+    ----------
+    port : int
+        The port the gateway is listening on.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, port: int) -> None:
+        self._port: int = port
+        self._connections: queue.LifoQueue = queue.LifoQueue()
+
+    # -----
+    # send
+    # -----
+    def send(
+        self,
+        senderName: str,
+        batch: List[Dict[str, str | int | float]],
+        profile: SenderProfile,
+    ) -> List[Dict[str, str | float | bool]]:
+        """
+        Submits a batch of messages in a single request.
+
+        Parameters
+        ----------
+        senderName : str
+            The name of the sender submitting the batch.
+
+        batch : List[Dict[str, str | int | float]]
+            The message records to send.
+
+        profile : SenderProfile
+            The sender's profile, which the gateway draws the send times and
+            outcomes from.
+
+        Returns
+        -------
+        List[Dict[str, str | float | bool]]
+            The response for each message, in the same form as simulate_send.
+        """
+        startTime: float = time.time()
+        body: bytes = json.dumps(
+            {
+                "sender": senderName,
+                "profile": profile,
+                "messages": batch,
+            }
+        ).encode()
+
+        results: List[Dict[str, str | float | bool]] = self._post(body)
+
+        # The gateway sends the batch one message after the other, so each
+        # message also waits on the ones ahead of it in the batch
+        for sms, result in zip(batch, results):
+            result["id"] = sms["id"]
+            result["sender"] = senderName
+            result["priority"] = sms["priority"]
+            result["queueWait"] = startTime - sms["enqueuedAt"]
+            startTime += result["timeToSend"]
+
+        return results
+
+    # -----
+    # close
+    # -----
+    def close(self) -> None:
+        """
+        Closes every pooled connection.
+        """
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # -----
+    # _post
+    # -----
+    def _post(self, body: bytes) -> List[Dict[str, str | float | bool]]:
+        for attempt in range(2):
+            try:
+                conn: http.client.HTTPConnection = self._connections.get_nowait()
+            except queue.Empty:
+                conn = http.client.HTTPConnection(GATEWAY_HOST, self._port)
+
+            try:
+                conn.request(
+                    "POST",
+                    GATEWAY_PATH,
+                    body=body,
+                    headers={"Content-Type": "application/json"},
+                )
+                response: http.client.HTTPResponse = conn.getresponse()
+                data: bytes = response.read()
+            except (ConnectionError, http.client.HTTPException):
+                conn.close()
+                if attempt == 1:
+                    raise
+                continue
+
+            if response.status != 200:
+                conn.close()
+                raise http.client.HTTPException(
+                    f"gateway returned status {response.status}"
+                )
+
+            self._connections.put(conn)
+            break
+
+        return json.loads(data)
@@ -0,0 +1,192 @@
+import multiprocessing as mp
+import multiprocessing.synchronize
+import queue
+import time
+from typing import Any
+from typing import List
+from typing import Sequence
+
+from sms_simulation.constants import LANE_POLL_TIME
+from sms_simulation.constants import LANE_WEIGHTS
+from sms_simulation.constants import SENTINEL
+
+
+# ============================================
+#                MessageLanes
+# ============================================
+class MessageLanes:
+    """
+    A production queue made up of one lane (queue) per message priority.
+
+    Consumers follow a weighted schedule: each dequeue prefers one lane and
+    falls back to the others in priority order. Most of the schedule prefers
+    the high-priority lane, so urgent messages skip the bulk backlog, but every
+    lane gets a share of the schedule, so bulk traffic is never starved.
+
+    Lanes whose priority is never produced are skipped entirely, so with a
+    single priority in use this behaves exactly like a plain queue.
+
+    Every process gets its own copy of this object (and so its own position
+    in the schedule), while the lanes themselves are shared, along with a
+    semaphore that counts the messages in every lane. Consumers wait on the
+    semaphore, so an idle consumer uses no CPU however many lanes are in use.
+    Messages must only be put on and taken off the lanes through this object.
+
+    Parameters
+    ----------
+    lanes : List[queue.Queue]
+        One queue per priority, highest priority first.
+
+    priorityMix : Sequence[float]
+        The share of the messages produced with each priority.
+
+    weights : Sequence[int]
+        The number of slots in the schedule that prefer each lane.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self,
+        lanes: List[queue.Queue],
+        priorityMix: Sequence[float],
+        weights: Sequence[int] = LANE_WEIGHTS,
+    ) -> None:
+        self._lanes: List[queue.Queue] = lanes
+        self._active: List[int] = [
+            i for i, share in enumerate(priorityMix) if share > 0.0
+        ]
+
+        # For each slot in the schedule, the order in which to try the lanes
+        self._orders: List[List[int]] = []
+
+        for slot in _build_schedule([weights[i] for i in self._active]):
+            preferred: int = self._active[slot]
+            self._orders.append(
+                [preferred] + [i for i in self._active if i != preferred]
+            )
+
+        self._slot: int = 0
+
+        # Counts the messages across every lane, so that consumers can block
+        # until there is one instead of polling each lane in turn
+        self._available: mp.synchronize.Semaphore = mp.Semaphore(0)
+
+    # -----
+    # put_nowait
+    # -----
+    def put_nowait(self, sms: Any) -> None:
+        """
+        Puts a message on the lane for its priority. Sentinels go on the
+        highest-priority lane in use so that they are seen promptly.
+
+        Parameters
+        ----------
+        sms : Any
+            The message record, or the sentinel.
+        """
+        lane: int = self._active[0] if sms == SENTINEL else sms["priority"]
+        self._lanes[lane].put_nowait(sms)
+        self._available.release()
+
+    # -----
+    # get_nowait
+    # -----
+    def get_nowait(self) -> Any:
+        """
+        Takes the next message according to the schedule.
+
+        Raises
+        ------
+        queue.Empty
+            If every lane is empty.
+        """
+        if not self._available.acquire(block=False):
+            raise queue.Empty
+
+        return self._take()
+
+    # -----
+    # get
+    # -----
+    def get(self, timeout: float) -> Any:
+        """
+        Takes the next message according to the schedule, waiting up to
+        timeout seconds for one to arrive.
+
+        Raises
+        ------
+        queue.Empty
+            If no message arrived in time.
+        """
+        if not self._available.acquire(timeout=timeout):
+            raise queue.Empty
+
+        return self._take()
+
+    # -----
+    # _take
+    # -----
+    def _take(self) -> Any:
+        """
+        Takes the next message according to the schedule. The caller must
+        already have acquired a message from the semaphore, so there is a
+        message for it in one of the lanes, though not necessarily yet: another
+        consumer may take the message that was counted for us while the one
+        counted for them lands in a lane we have already tried, and a put on a
+        multiprocessing queue takes a moment to show up. So we keep scanning
+        until we get one.
+        """
+        while True:
+            for lane in self._orders[self._slot]:
+                try:
+                    sms: Any = self._lanes[lane].get_nowait()
+                except queue.Empty:
+                    continue
+
+                self._slot = (self._slot + 1) % len(self._orders)
+                return sms
+
+            time.sleep(LANE_POLL_TIME)
+
+    # -----
+    # qsize
+    # -----
+    def qsize(self) -> int:
+        """
+        The total number of items across every lane in use.
+        """
+        return sum(self._lanes[i].qsize() for i in self._active)
+
+
+# ============================================
+#               _build_schedule
+# ============================================
+def _build_schedule(weights: Sequence[int]) -> List[int]:
+    """
+    Spreads the slots of each lane evenly through the schedule using smooth
+    weighted round-robin, e.g., weights of (3, 1) give [0, 0, 1, 0].
+
+    Parameters
+    ----------
+    weights : Sequence[int]
+        The number of slots for each lane.
+
+    Returns
+    -------
+    List[int]
+        The preferred lane for each slot.
+    """
+    total: int = sum(weights)
+    current: List[int] = [0] * len(weights)
+    schedule: List[int] = []
+
+    for _ in range(total):
+        for i, weight in enumerate(weights):
+            current[i] += weight
+        chosen: int = max(range(len(weights)), key=lambda i: current[i])
+        current[chosen] -= total
+        schedule.append(chosen)
+
+    return schedule
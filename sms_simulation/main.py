@@ -3,6 +3,7 @@ import multiprocessing as mp
 
 from sms_simulation.args import parse_args
 from sms_simulation.monitor import SmsMonitor
+from sms_simulation.throughput import estimate_deadline
 
 
 # ============================================
@@ -25,5 +26,9 @@ def main() -> int:
     args: argparse.Namespace = parse_args()
     monitor: SmsMonitor = SmsMonitor(args)
 
-    timeout: float = args.nMessages
+    timeout: float = (
+        args.timeout
+        if args.timeout is not None
+        else estimate_deadline(args.nMessages, args.profiles)
+    )
     return monitor.run(timeout)
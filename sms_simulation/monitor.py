@@ -1,15 +1,39 @@
 import argparse
+import ctypes
+import math
 import multiprocessing as mp
+import multiprocessing.managers
+import multiprocessing.synchronize
 import queue
+import threading
 import time
+import tracemalloc
 from typing import Dict
 from typing import List
 
-from progress.spinner import Spinner  # type: ignore
-
+from sms_simulation.constants import GATEWAY_START_TIMEOUT
+from sms_simulation.constants import PRIORITY_NAMES
+from sms_simulation.constants import RESPONSE_POLL_TIME
 from sms_simulation.constants import SENTINEL
+from sms_simulation.constants import STARTUP_ALLOWANCE
+from sms_simulation.gateway import MockGateway
+from sms_simulation.lanes import MessageLanes
+from sms_simulation.pool import SmsSenderPool
 from sms_simulation.producer import SmsProducer
+from sms_simulation.renderer import ProgressRenderer
+from sms_simulation.resources import collect_usage
+from sms_simulation.resources import format_usage
+from sms_simulation.resources import sample_process_usage
+from sms_simulation.resources import sample_usage
+from sms_simulation.resources import start_accounting
 from sms_simulation.sender import SmsSender
+from sms_simulation.shutdown import init_worker_signals
+from sms_simulation.shutdown import ShutdownCoordinator
+from sms_simulation.throughput import estimate_stall_timeout
+from sms_simulation.throughput import ThroughputEstimator
+from sms_simulation.trace import join_trace_parts
+from sms_simulation.trace import TraceReplayer
+from sms_simulation.trace import TraceWriter
 
 
 # ============================================
@@ -17,8 +41,8 @@ from sms_simulation.sender import SmsSender
 # ============================================
 class SmsMonitor:
     """
-    Oversees the sms producer and sender processes as well as displays
-    progress information to the user via stdout.
+    Oversees the sms producer and sender processes and collects their
+    responses. Progress is displayed by a separate renderer.
 
     Parameters
     ----------
@@ -31,35 +55,211 @@ class SmsMonitor:
     # -----
     def __init__(self, args: argparse.Namespace) -> None:
         self._nMessages: int = args.nMessages
-        self._progUpdateTime: float = args.progUpdateTime
+        self._progressMode: str = args.progressMode
+        self._stallTimeout: float = (
+            args.stallTimeout
+            if args.stallTimeout is not None
+            else estimate_stall_timeout(args.profiles)
+        )
+        self._throughput: ThroughputEstimator = ThroughputEstimator()
+        self._elapsed: float = 0.0
+        self._failureReason: str = ""
 
-        self._processManager: mp.managers.SyncManager = mp.Manager()
-        self._msgQueue: queue.Queue = self._processManager.Queue(
-            maxsize=self._nMessages + args.nSenders
+        self._shutdown: ShutdownCoordinator = ShutdownCoordinator(
+            args.onInterrupt, args.shutdownTimeout
+        )
+
+        # The manager ignores Ctrl-C so that it outlives the workers while
+        # they are being shut down
+        self._processManager: mp.managers.SyncManager = mp.managers.SyncManager()
+        self._processManager.start(init_worker_signals)
+        self._msgQueue: MessageLanes = MessageLanes(
+            [
+                self._processManager.Queue(maxsize=self._nMessages + args.nSenders)
+                for _ in PRIORITY_NAMES
+            ],
+            args.priorityMix,
         )
         self._responseQueue: queue.Queue = self._processManager.Queue(
             maxsize=self._nMessages + args.nSenders
         )
 
-        self._smsProducer: SmsProducer = SmsProducer(
-            self._nMessages, self._msgQueue, "producer"
+        # Every process reports its own resource usage here as it exits
+        self._resourceQueue: queue.Queue | None = (
+            self._processManager.Queue() if args.resources else None
         )
-        self._smsSenders: List[SmsSender] = [
-            SmsSender(
-                args.timeToSend[i],
-                args.sendFailureRate[i],
+        self._resourceUsage: List[Dict[str, str | float]] = []
+        start_accounting(self._resourceQueue)
+
+        self._stopEvent: mp.synchronize.Event = mp.Event()
+        self._producedCount: ctypes.c_longlong = mp.RawValue("q", 0)
+
+        # When recording, the producer writes the messages and the monitor
+        # writes the responses, each to their own part of the trace
+        self._recordPath: str | None = args.record
+        self._traceWriter: TraceWriter | None = None
+        traceStart: float = time.time()
+
+        if self._recordPath is not None:
+            self._traceWriter = TraceWriter(f"{self._recordPath}.responses", traceStart)
+            self._traceWriter.write_header(
+                {
+                    "fleet": args.profiles.groups(),
+                    "priorityMix": args.priorityMix,
+                    "seed": args.seed,
+                }
+            )
+
+        self._smsProducer: mp.Process
+
+        if args.replay is not None:
+            self._smsProducer = TraceReplayer(
+                args.replay,
+                args.replaySpeed,
                 self._msgQueue,
-                self._responseQueue,
-                f"sender_{i}",
+                "producer",
+                self._stopEvent,
+                self._producedCount,
+                self._resourceQueue,
+            )
+        else:
+            self._smsProducer = SmsProducer(
+                self._nMessages,
+                self._msgQueue,
+                "producer",
+                args.seed,
+                self._stopEvent,
+                self._producedCount,
+                args.priorityMix,
+                f"{self._recordPath}.messages" if self._recordPath else None,
+                traceStart,
+                self._resourceQueue,
+            )
+        self._gateway: MockGateway | None = None
+        self._gatewayPort: ctypes.c_int | None = None
+        self._gatewayReady: mp.synchronize.Event = mp.Event()
+        self._gatewayStop: mp.synchronize.Event = mp.Event()
+        self._gatewayBatch: int = args.gatewayBatch
+
+        if args.transport == "http":
+            self._gatewayPort = mp.RawValue("i", 0)
+            self._gateway = MockGateway(
+                self._gatewayPort,
+                self._gatewayReady,
+                self._gatewayStop,
+                "gateway",
+                args.seed,
+                self._resourceQueue,
             )
-            for i in range(args.nSenders)
-        ]
+
+        self._smsSenders: List[mp.Process] = self._build_senders(args)
 
         self._state: Dict[str, float] = {
             "messagesSent": 0.0,
             "failedSends": 0.0,
             "totalSendTime": 0.0,
+            "rate": math.nan,
+            "eta": math.nan,
         }
+        self._stateLock: threading.Lock = threading.Lock()
+
+        # Queue-wait and send-latency statistics for each priority
+        self._priorityStats: List[Dict[str, float]] = [
+            {
+                "count": 0.0,
+                "totalQueueWait": 0.0,
+                "maxQueueWait": 0.0,
+                "totalLatency": 0.0,
+                "maxLatency": 0.0,
+            }
+            for _ in PRIORITY_NAMES
+        ]
+
+        self._renderer: ProgressRenderer = ProgressRenderer(
+            self._snapshot, self._nMessages, args.progUpdateTime, args.progressMode
+        )
+
+    # -----
+    # elapsed
+    # -----
+    @property
+    def elapsed(self) -> float:
+        """
+        The time, in seconds, spent collecting responses during the last run.
+        """
+        return self._elapsed
+
+    # -----
+    # resourceUsage
+    # -----
+    @property
+    def resourceUsage(self) -> List[Dict[str, str | float]]:
+        """
+        The resource usage of each process during the last run, as returned by
+        sample_usage. Empty unless the usage was being collected.
+        """
+        return self._resourceUsage
+
+    # -----
+    # _build_senders
+    # -----
+    def _build_senders(self, args: argparse.Namespace) -> List[mp.Process]:
+        """
+        Creates the processes that send out the messages.
+
+        With the process backend every sender gets its own process. With the
+        thread backend the senders are split into contiguous blocks, one per
+        worker process, and each block is run as threads by a pool.
+
+        Parameters
+        ----------
+        args : argparse.Namespace
+            The parsed command-line arguments passed to the tool.
+
+        Returns
+        -------
+        List[mp.Process]
+            The sender processes. Each one consumes exactly one sentinel.
+        """
+        if args.backend == "process":
+            return [
+                SmsSender(
+                    args.profiles[i],
+                    self._msgQueue,
+                    self._responseQueue,
+                    f"sender_{i}",
+                    args.seed,
+                    self._stopEvent,
+                    self._gatewayPort,
+                    self._gatewayBatch,
+                    self._resourceQueue,
+                )
+                for i in range(args.nSenders)
+            ]
+
+        pools: List[mp.Process] = []
+        blockSize, remainder = divmod(args.nSenders, args.nWorkers)
+        start: int = 0
+
+        for w in range(args.nWorkers):
+            stop: int = start + blockSize + (1 if w < remainder else 0)
+            pools.append(
+                SmsSenderPool(
+                    args.profiles,
+                    range(start, stop),
+                    self._msgQueue,
+                    self._responseQueue,
+                    f"worker_{w}",
+                    args.seed,
+                    self._stopEvent,
+                    self._gatewayPort,
+                    self._gatewayBatch,
+                    self._resourceQueue,
+                )
+            )
+            start = stop
+
+        return pools
 
     # -----
     # run
@@ -76,11 +276,33 @@ class SmsMonitor:
         int
             0 on success, a negative value otherwise.
         """
-        self._start_processes()
-        monitorReturnValue: int = self._monitor(timeout)
-        cleanupReturnValue: int = self._cleanup()
-        if monitorReturnValue + cleanupReturnValue == 0:
-            self._display()
+        if self._progressMode != "quiet":
+            print(
+                f"Running with timeout: {timeout:.2f}s "
+                f"(stall timeout: {self._stallTimeout:.2f}s)\n"
+            )
+
+        self._shutdown.install()
+
+        try:
+            monitorReturnValue: int = self._start_processes()
+
+            if monitorReturnValue == 0:
+                self._renderer.start()
+                startTime: float = time.monotonic()
+                monitorReturnValue = self._monitor(timeout)
+                self._elapsed = time.monotonic() - startTime
+                self._renderer.stop()
+
+                if self._progressMode != "quiet":
+                    self._display_priority_summary()
+
+            if monitorReturnValue != 0:
+                print(f"Error: {self._failureReason}")
+
+            cleanupReturnValue: int = self._cleanup()
+        finally:
+            self._shutdown.restore()
 
         print("Done.")
         return monitorReturnValue + cleanupReturnValue
@@ -88,141 +310,277 @@ class SmsMonitor:
     # -----
     # _start_processes
     # -----
-    def _start_processes(self) -> None:
+    def _start_processes(self) -> int:
+        """
+        Starts the gateway (if any), the producer, and the senders.
+
+        Returns
+        -------
+        int
+            0 on success, -1 if the gateway did not start, in which case
+            nothing else is started.
+        """
+        # The senders need to know the gateway's port when they start
+        if self._gateway is not None:
+            self._gateway.start()
+            if not self._gatewayReady.wait(GATEWAY_START_TIMEOUT):
+                self._failureReason = "gateway did not start."
+                return -1
+
         self._smsProducer.start()
 
         for sender in self._smsSenders:
             sender.start()
 
+        return 0
+
     # -----
     # _monitor
     # -----
     def _monitor(self, timeout: float) -> int:
-        print(f"Running with timeout: {timeout:.2f}s\n")
+        """
+        Collects the senders' responses until every message has been handled,
+        the timeout is hit, or no response has arrived within the stall
+        timeout (plus the startup allowance, for the first response).
 
-        returnValue: int = 0
-        spinner: Spinner = Spinner()
+        Nothing in this loop writes to stdout; displaying the progress is left
+        to the renderer, which works from snapshots of the state.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum number of seconds to wait for all of the messages.
 
-        startTime: float = time.time()
-        prevUpdateTime: float = time.time()
+        Returns
+        -------
+        int
+            0 on success, -1 on timeout or stall.
+        """
+        startTime: float = time.monotonic()
+        deadline: float = startTime + timeout
+        # The processes need time to start up before the first response can
+        # arrive, so the first stall window gets the same allowance as the
+        # deadline
+        lastProgressTime: float = startTime + STARTUP_ALLOWANCE
+        self._throughput.update(0.0, startTime)
 
         while self._state["messagesSent"] < self._nMessages:
             try:
-                response: Dict[str, float | bool] = self._responseQueue.get_nowait()
+                response: Dict[str, float | bool] = self._responseQueue.get(
+                    timeout=RESPONSE_POLL_TIME
+                )
             except queue.Empty:
-                pass
-            else:
-                self._state["messagesSent"] += 1.0
-                self._state["failedSends"] += 1 if not response["successful"] else 0
-                self._state["totalSendTime"] += response["timeToSend"]
-
-            currentTime: float = time.time()
-
-            if (currentTime - prevUpdateTime) >= self._progUpdateTime:
-                self._display(spinner)
-                self._move_cursor_up(3)
-                prevUpdateTime = currentTime
-
-            if currentTime - startTime > timeout:
-                self._move_cursor_down(4)
-                print("Error: timeout processing messages.")
-                returnValue = -1
-                break
+                response = {}
 
-        return returnValue
+            currentTime: float = time.monotonic()
+
+            with self._stateLock:
+                if response:
+                    self._record_response(response)
+                    lastProgressTime = currentTime
+
+                self._throughput.update(self._state["messagesSent"], currentTime)
+                self._state["rate"] = self._throughput.rate
+                self._state["eta"] = self._throughput.eta(
+                    self._nMessages - self._state["messagesSent"]
+                )
+
+            if self._shutdown.requested:
+                self._failureReason = (
+                    f"received {self._shutdown.signalName}: shutting down "
+                    f"({self._shutdown.policy})."
+                )
+                return -1
+
+            if currentTime > deadline:
+                self._failureReason = "timeout processing messages."
+                return -1
+
+            if currentTime - lastProgressTime > self._stallTimeout:
+                self._failureReason = (
+                    f"no progress for {self._stallTimeout:.2f}s, giving up."
+                )
+                return -1
+
+        return 0
 
     # -----
-    # _display
+    # _record_response
     # -----
-    def _display(self, spinner: Spinner | None = None) -> None:
+    def _record_response(self, response: Dict[str, float | bool]) -> None:
         """
-        Displays progress to stdout.
+        Adds a single sender response to the state. The caller must hold the
+        state lock.
         """
-        # Avoid division by zero errors
-        avgTime: float | str = "N/A"
+        self._state["messagesSent"] += 1.0
+        self._state["failedSends"] += 0 if response["successful"] else 1
+        self._state["totalSendTime"] += response["timeToSend"]
+
+        # The latency covers the whole time from being produced to being sent
+        latency: float = response["queueWait"] + response["timeToSend"]
+        stats: Dict[str, float] = self._priorityStats[int(response["priority"])]
+        stats["count"] += 1.0
+        stats["totalQueueWait"] += response["queueWait"]
+        stats["maxQueueWait"] = max(stats["maxQueueWait"], response["queueWait"])
+        stats["totalLatency"] += latency
+        stats["maxLatency"] = max(stats["maxLatency"], latency)
+
+        if self._traceWriter is not None:
+            self._traceWriter.write_response(response)
 
-        if self._state["messagesSent"] > 0:
-            avgTime = round(
-                self._state["totalSendTime"] / self._state["messagesSent"], 2
-            )
+    # -----
+    # _display_priority_summary
+    # -----
+    def _display_priority_summary(self) -> None:
+        """
+        Displays the average and worst queue wait and send latency for each
+        priority that had messages sent.
+        """
+        print("\nPriority   Sent      Avg wait   Max wait   Avg latency   Max latency")
+
+        with self._stateLock:
+            for name, stats in zip(PRIORITY_NAMES, self._priorityStats):
+                if stats["count"] == 0:
+                    continue
+                print(
+                    f"{name:<10} {int(stats['count']):<9} "
+                    f"{stats['totalQueueWait'] / stats['count']:<10.3f} "
+                    f"{stats['maxQueueWait']:<10.3f} "
+                    f"{stats['totalLatency'] / stats['count']:<13.3f} "
+                    f"{stats['maxLatency']:.3f}"
+                )
+
+        print()
 
-        print(
-            "Number of messages sent: "
-            f"{int(self._state['messagesSent'])} / {self._nMessages}\n"
-            f"Number of messages failed: {int(self._state['failedSends'])}\n"
-            f"Average time per message: {avgTime}"
-        )
-        if spinner:
-            spinner.next()
+    # -----
+    # _snapshot
+    # -----
+    def _snapshot(self) -> Dict[str, float]:
+        """
+        Returns a consistent copy of the state for the renderer.
+        """
+        with self._stateLock:
+            return dict(self._state)
 
     # -----
     # _cleanup
     # -----
     def _cleanup(self) -> int:
-        returnValue: int = self._stop_process(self._smsProducer)
-
-        for _ in range(len(self._smsSenders)):
-            self._msgQueue.put_nowait(SENTINEL)
-
-        for proc in self._smsSenders:
-            returnValue += self._stop_process(proc)
+        """
+        Stops the producer and sender processes and then the process manager.
 
-        return returnValue
+        The stop event tells the producer to stop generating messages and the
+        senders to stop taking new ones, so, even when the run did not finish,
+        the senders only have to finish the messages they are working on. All
+        of the senders are waited on together, under one deadline. If the run
+        was interrupted and the policy is to abort (or a second signal came
+        in), every process is terminated straight away instead.
 
-    # -----
-    # _stop_process
-    # -----
-    def _stop_process(self, proc: mp.Process) -> int:
+        Returns
+        -------
+        int
+            0 if every process exited cleanly, a negative value otherwise.
+        """
         returnValue: int = 0
+        completed: bool = self._state["messagesSent"] >= self._nMessages
 
-        proc.join(timeout=1)
+        self._stopEvent.set()
 
-        exitCode: int | None = proc.exitcode
+        if self._shutdown.requested and self._shutdown.policy == "abort":
+            returnValue = self._shutdown.stop_processes(
+                [self._smsProducer, *self._smsSenders], graceful=False
+            )
+        else:
+            returnValue = self._shutdown.stop_processes([self._smsProducer])
+
+            # Wakes up any senders waiting on the empty queue
+            if completed:
+                for _ in range(len(self._smsSenders)):
+                    self._msgQueue.put_nowait(SENTINEL)
+
+            returnValue += self._shutdown.stop_processes(self._smsSenders)
+
+        # The gateway goes last so that it can answer the senders' final
+        # requests
+        if self._gateway is not None:
+            self._gatewayStop.set()
+            returnValue += self._shutdown.stop_processes([self._gateway])
+
+        if not completed:
+            self._report_unfinished()
+
+        if self._traceWriter is not None:
+            self._traceWriter.close()
+            join_trace_parts(
+                self._recordPath,
+                [f"{self._recordPath}.responses", f"{self._recordPath}.messages"],
+            )
 
-        if exitCode is None:
-            print(f"Error: process {proc.name} not done: terminating.")
-            proc.terminate()
-            proc.join(timeout=1)
-            if proc.exitcode is None:
-                proc.kill()
-                proc.join(timeout=1)
-            returnValue = -1
+        # The workers have all exited, so their reports are in
+        if self._resourceQueue is not None:
+            self._report_resources()
 
-        elif exitCode != 0:
-            print(f"Error: process {proc.name} failed with exit code: {exitCode}")
-            returnValue = -1
+        self._processManager.shutdown()
 
         return returnValue
 
     # -----
-    # _move_cursor_up
+    # _report_resources
     # -----
-    def _move_cursor_up(self, nLines: int) -> None:
+    def _report_resources(self) -> None:
         """
-        Keeps the updated display "in-place" by using the ascii code
-        to move the cursor up the desired number of lines.
-
-        Parameters
-        ----------
-        nLines : int
-            The number of lines by which to move up the cursor.
+        Gathers the usage reported by the workers, samples the process manager
+        and the monitor itself, and displays the lot. Workers that were
+        terminated never get to report.
         """
-        for _ in range(nLines):
-            print("\033[F", end="")
+        reports: List[Dict[str, str | float]] = collect_usage(self._resourceQueue)
+        nExpected: int = (
+            1 + len(self._smsSenders) + (1 if self._gateway is not None else 0)
+        )
+
+        # The manager does not run any of our code, so it is sampled from the
+        # outside
+        managerPid: int = self._processManager._process.pid  # pylint: disable=W0212
+
+        self._resourceUsage = [
+            sample_usage("monitor"),
+            sample_process_usage(managerPid, "manager"),
+            *reports,
+        ]
+        tracemalloc.stop()
+
+        if self._progressMode == "quiet":
+            return
+
+        print()
+        for line in format_usage(self._resourceUsage):
+            print(line)
+        if len(reports) < nExpected:
+            print(f"({nExpected - len(reports)} processes exited without reporting)")
+        print()
 
     # -----
-    # _move_cursor_down
+    # _report_unfinished
     # -----
-    def _move_cursor_down(self, nLines: int) -> None:
+    def _report_unfinished(self) -> None:
         """
-        Shifts below the progress display by using the ascii code
-        to move the cursor down the desired number of lines.
-
-        Parameters
-        ----------
-        nLines : int
-            The number of lines by which to move down the cursor.
+        Collects any responses that arrived during shutdown and reports what
+        happened to the messages that were not sent.
         """
-        for _ in range(nLines):
-            print("\033[B", end="")
-        print("\033[K", end="")
+        while True:
+            try:
+                response: Dict[str, float | bool] = self._responseQueue.get_nowait()
+            except queue.Empty:
+                break
+            with self._stateLock:
+                self._record_response(response)
+
+        sent: int = int(self._state["messagesSent"])
+        produced: int = self._producedCount.value
+        queued: int = self._msgQueue.qsize()
+        inFlight: int = max(produced - queued - sent, 0)
+
+        print(
+            f"Shutdown: {sent} sent, {inFlight} in flight at exit, {queued} still "
+            f"queued, {self._nMessages - produced} never produced."
+        )
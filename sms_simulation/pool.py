@@ -0,0 +1,302 @@
+import ctypes
+import multiprocessing as mp
+import multiprocessing.synchronize
+import queue
+import threading
+import time
+from typing import Dict
+from typing import List
+
+from sms_simulation.constants import QUEUE_POLL_TIME
+from sms_simulation.constants import SENTINEL
+from sms_simulation.fleet import SenderProfile
+from sms_simulation.fleet import SenderProfiles
+from sms_simulation.gateway import GatewayClient
+from sms_simulation.lanes import MessageLanes
+from sms_simulation.resources import report_usage
+from sms_simulation.resources import start_accounting
+from sms_simulation.rng import BlockSampler
+from sms_simulation.sender import failed_responses
+from sms_simulation.sender import RateLimiter
+from sms_simulation.sender import simulate_send
+from sms_simulation.sender import take_batch
+from sms_simulation.shutdown import init_worker_signals
+
+
+# ============================================
+#                SmsSenderPool
+# ============================================
+class SmsSenderPool(mp.Process):
+    """
+    Represents a worker process that runs several logical senders as threads.
+
+    Sending an sms is simulated with a sleep, which releases the GIL, so many
+    senders can share a single interpreter instead of each paying for a whole
+    process. The main thread of the pool pulls messages off of the production
+    queue and hands them to the sender threads through a local queue. That
+    queue holds no more than one gateway batch, so the pool does not take
+    messages far ahead of its senders and the lanes' priority weighting still
+    holds when every sender is busy. A single forwarding thread pushes the
+    senders' responses back to the monitor, so the pool only ever holds two
+    connections to the process manager no matter how many senders it runs.
+
+    Parameters
+    ----------
+    profiles : SenderProfiles
+        The profiles of every sender in the fleet. Only the profiles of the
+        pool's own senders are ever looked up.
+
+    senders : range
+        The indices of the logical senders run by the pool. Sender i is named
+        sender_i.
+
+    msgQueue : MessageLanes
+        The production queue holding the generated sms messages that are ready
+        to be sent out.
+
+    responseQueue : mp.Queue
+        After a sender sends (or fails to send) a message, it puts information
+        about the sending into this queue to be aggregated by the monitor.
+
+    seed : int | None
+        The seed for the whole simulation. Each sender thread's random stream is
+        derived from it and the sender's name, so a given sender draws the same
+        values under either backend. If None, the streams are not reproducible.
+
+    stopEvent : mp.Event | None
+        When set, the pool stops taking new messages, lets its senders finish
+        the messages they already have, and quits.
+
+    gatewayPort : mp.RawValue | None
+        The port of the mock gateway. If given, messages are submitted to the
+        gateway over HTTP instead of being sent with a sleep. The sender threads
+        share one pool of keep-alive connections.
+
+    gatewayBatch : int
+        The most messages a sender thread submits to the gateway in a single
+        request.
+
+    resourceQueue : mp.Queue | None
+        If given, the pool's resource usage is put on this queue at exit.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self,
+        profiles: SenderProfiles,
+        senders: range,
+        msgQueue: MessageLanes,
+        responseQueue: queue.Queue,
+        procName: str,
+        seed: int | None = None,
+        stopEvent: mp.synchronize.Event | None = None,
+        gatewayPort: ctypes.c_int | None = None,
+        gatewayBatch: int = 1,
+        resourceQueue: queue.Queue | None = None,
+    ) -> None:
+        self._profiles: SenderProfiles = profiles
+        self._senders: range = senders
+        self._msgQueue: MessageLanes = msgQueue
+        self._responseQueue: queue.Queue = responseQueue
+        self._seed: int | None = seed
+        self._stopEvent: mp.synchronize.Event | None = stopEvent
+        self._gatewayPort: ctypes.c_int | None = gatewayPort
+        self._gatewayBatch: int = gatewayBatch
+        self._resourceQueue: queue.Queue | None = resourceQueue
+
+        super().__init__(
+            target=self._run_pool,
+            args=(self._msgQueue, self._responseQueue),
+            name=procName,
+        )
+
+    # -----
+    # _run_pool
+    # -----
+    def _run_pool(self, msgQueue: MessageLanes, responseQueue: mp.Queue) -> None:
+        """
+        The target function called by the worker process.
+
+        Starts the sender and forwarding threads and then feeds the senders
+        until a sentinel value arrives on the production queue or the stop event
+        is set, at which point every sender is told to quit and the pool shuts
+        down.
+
+        Parameters
+        ----------
+        msgQueue : MessageLanes
+            The production queue holding the generated sms messages that are ready
+            to be sent out.
+
+        responseQueue : mp.Queue
+            After a sender sends (or fails to send) a message, it puts information
+            about the sending into this queue to be aggregated by the monitor.
+        """
+        init_worker_signals()
+        start_accounting(self._resourceQueue)
+
+        nSenders: int = len(self._senders)
+        # Messages are only taken off the lanes as the senders free up, so that
+        # the lanes' schedule decides what is sent next even under load. Each
+        # sender thread only ever batches what is already in the inbox
+        inbox: queue.Queue = queue.Queue(maxsize=self._gatewayBatch)
+        outbox: queue.Queue = queue.Queue()
+        client: GatewayClient | None = None
+
+        if self._gatewayPort is not None:
+            client = GatewayClient(self._gatewayPort.value)
+
+        senders: List[threading.Thread] = [
+            threading.Thread(
+                target=self._send_sms,
+                args=(i, inbox, outbox, client),
+                name=f"sender_{i}",
+            )
+            for i in self._senders
+        ]
+        forwarder: threading.Thread = threading.Thread(
+            target=self._forward_responses,
+            args=(outbox, responseQueue),
+            name=f"{self.name}_forwarder",
+        )
+
+        forwarder.start()
+        for sender in senders:
+            sender.start()
+
+        while self._stopEvent is None or not self._stopEvent.is_set():
+            try:
+                sms: Dict[str, str | int | float] | None = msgQueue.get(
+                    timeout=QUEUE_POLL_TIME
+                )
+            except queue.Empty:
+                continue
+            if sms == SENTINEL:
+                break
+
+            # Don't block on a full inbox once we have been told to stop
+            while self._stopEvent is None or not self._stopEvent.is_set():
+                try:
+                    inbox.put(sms, timeout=QUEUE_POLL_TIME)
+                    break
+                except queue.Full:
+                    continue
+
+        nSentinels: int = nSenders
+
+        while nSentinels > 0:
+            try:
+                inbox.put(SENTINEL, timeout=QUEUE_POLL_TIME)
+                nSentinels -= 1
+            except queue.Full:
+                # A sender thread that has died will never take its sentinel
+                nSentinels = min(
+                    nSentinels, sum(sender.is_alive() for sender in senders)
+                )
+
+        for sender in senders:
+            sender.join()
+
+        outbox.put(SENTINEL)
+        forwarder.join()
+
+        if client is not None:
+            client.close()
+
+        report_usage(self._resourceQueue, self.name)
+
+    # -----
+    # _send_sms
+    # -----
+    def _send_sms(
+        self,
+        senderIndex: int,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        client: GatewayClient | None,
+    ) -> None:
+        """
+        The target function called by each sender thread.
+
+        Each thread owns its own random stream so that the senders do not
+        share a single generator. A send that raises is reported as a failed
+        send rather than taking the thread down with it.
+
+        Parameters
+        ----------
+        senderIndex : int
+            The index of this sender in the fleet.
+
+        inbox : queue.Queue
+            The pool-local queue of messages waiting to be sent.
+
+        outbox : queue.Queue
+            The pool-local queue of responses waiting to be forwarded to the
+            monitor.
+
+        client : GatewayClient | None
+            The pool's gateway client, or None to send with a sleep.
+        """
+        senderName: str = f"sender_{senderIndex}"
+        sampler: BlockSampler = BlockSampler(self._seed, senderName)
+        profile: SenderProfile = self._profiles[senderIndex]
+        limiter: RateLimiter = RateLimiter(profile.rateLimit)
+
+        while True:
+            sms: Dict[str, str | int | float] | None = inbox.get()
+
+            if sms == SENTINEL:
+                break
+
+            batch: List[Dict[str, str | int | float]] = [sms]
+            sawSentinel: bool = False
+
+            if client is not None:
+                batch, sawSentinel = take_batch(
+                    sms, inbox.get_nowait, self._gatewayBatch
+                )
+
+            limiter.wait(len(batch))
+            startTime: float = time.time()
+
+            try:
+                if client is None:
+                    responses: List[Dict[str, str | float | bool]] = [
+                        simulate_send(senderName, sms, sampler, profile)
+                    ]
+                else:
+                    responses = client.send(senderName, batch, profile)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # A dead thread would leave the rest of its messages stranded
+                responses = failed_responses(senderName, batch, startTime)
+
+            for response in responses:
+                outbox.put(response)
+
+            if sawSentinel:
+                break
+
+    # -----
+    # _forward_responses
+    # -----
+    def _forward_responses(self, outbox: queue.Queue, responseQueue: mp.Queue) -> None:
+        """
+        Relays the responses of every sender thread to the monitor.
+
+        Parameters
+        ----------
+        outbox : queue.Queue
+            The pool-local queue of responses waiting to be forwarded.
+
+        responseQueue : mp.Queue
+            The queue read by the monitor.
+        """
+        while True:
+            response: Dict[str, float | bool] | None = outbox.get()
+
+            if response == SENTINEL:
+                break
+
+            responseQueue.put_nowait(response)
@@ -1,8 +1,22 @@
+import bisect
+import ctypes
+import itertools
 import multiprocessing as mp
+import multiprocessing.synchronize
 import queue
 import random
 import string
+import time
 from typing import Dict
+from typing import List
+from typing import Sequence
+
+from sms_simulation.lanes import MessageLanes
+from sms_simulation.resources import report_usage
+from sms_simulation.resources import start_accounting
+from sms_simulation.rng import make_rng
+from sms_simulation.shutdown import init_worker_signals
+from sms_simulation.trace import TraceWriter
 
 
 # ============================================
@@ -12,22 +26,74 @@ class SmsProducer(mp.Process):
     """
     Generates the sms messages to be sent by the sender processes.
 
+    Each message is a record holding its id (its position in the production
+    order), the phone number it is going to, its body, its priority (an index
+    into PRIORITY_NAMES), and the time at which it was put on the production
+    queue.
+
     Parameters
     ----------
     nMessages : int
         The number of sms messages to be generated.
 
-    msgQueue : mp.Queue
+    msgQueue : MessageLanes
         The production queue holding the generated sms messages that are ready
         to be sent out.
+
+    seed : int | None
+        The seed for the whole simulation. The producer's random stream is derived
+        from it and the producer's name. If None, the stream is not reproducible.
+
+    stopEvent : mp.Event | None
+        When set, the producer stops generating messages early.
+
+    producedCount : mp.RawValue | None
+        Incremented after each message is put on the production queue so that
+        the monitor knows how many messages were made when shutting down early.
+
+    priorityMix : Sequence[float] | None
+        The share of the messages given each priority. If None, every message
+        has the first priority.
+
+    tracePath : str | None
+        If given, every message is also written to this file, to become part
+        of a trace of the run.
+
+    traceStart : float
+        The wall-clock time that the trace's enqueue times are relative to.
+
+    resourceQueue : mp.Queue | None
+        If given, the producer's resource usage is put on this queue at exit.
     """
 
     # -----
     # constructor
     # -----
-    def __init__(self, nMessages: int, msgQueue: queue.Queue, procName: str) -> None:
+    def __init__(
+        self,
+        nMessages: int,
+        msgQueue: MessageLanes,
+        procName: str,
+        seed: int | None = None,
+        stopEvent: mp.synchronize.Event | None = None,
+        producedCount: ctypes.c_longlong | None = None,
+        priorityMix: Sequence[float] | None = None,
+        tracePath: str | None = None,
+        traceStart: float = 0.0,
+        resourceQueue: queue.Queue | None = None,
+    ) -> None:
         self._nMessages: int = nMessages
-        self._msgQueue: queue.Queue = msgQueue
+        self._msgQueue: MessageLanes = msgQueue
+        self._seed: int | None = seed
+        self._stopEvent: mp.synchronize.Event | None = stopEvent
+        self._producedCount: ctypes.c_longlong | None = producedCount
+        self._cumulativeMix: List[float] = list(
+            itertools.accumulate(priorityMix if priorityMix is not None else [1.0])
+        )
+
+        self._tracePath: str | None = tracePath
+        self._traceStart: float = traceStart
+        self._resourceQueue: queue.Queue | None = resourceQueue
 
         self._maxMsgLen: int = 100
 
@@ -40,41 +106,73 @@ class SmsProducer(mp.Process):
     # -----
     # _generate_phone_number
     # -----
-    def _generate_phone_number(self) -> str:
+    def _generate_phone_number(self, rng: random.Random) -> str:
         """
         Generates a random phone number of the form xxx-xxx-xxxx. No country code
         is applied, so we are implicitly assuming that these are all U.S. numbers.
 
+        All ten digits come from a single draw.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The producer's random number generator.
+
         Returns
         -------
         str
             The randomly generated phone number that the sms will be sent to.
         """
-        phoneNumber: str = "-".join(
-            str(random.randint(0, 999)).zfill(3) for _ in range(3)
-        )
-        return phoneNumber + str(random.randint(0, 9))
+        digits: str = str(rng.randrange(10_000_000_000)).zfill(10)
+        return f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
 
     # -----
     # _generate_message
     # -----
-    def _generate_message(self) -> str:
+    def _generate_message(self, rng: random.Random) -> str:
         """
         Generates a string of random characters up to self._maxMsgLen in length.
         These characters represent the body of the sms being sent.
 
+        The characters are drawn in a single bulk call rather than one at a time.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The producer's random number generator.
+
         Returns
         -------
         str
             The random string of characters representing the body of the sms.
         """
-        msgLen: int = random.randint(1, self._maxMsgLen)
-        return "".join(random.choice(string.ascii_lowercase) for _ in range(msgLen))
+        msgLen: int = rng.randint(1, self._maxMsgLen)
+        return "".join(rng.choices(string.ascii_lowercase, k=msgLen))
+
+    # -----
+    # _generate_priority
+    # -----
+    def _generate_priority(self, rng: random.Random) -> int:
+        """
+        Randomly picks a message priority according to the priority mix.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The producer's random number generator.
+
+        Returns
+        -------
+        int
+            The index of the priority in PRIORITY_NAMES.
+        """
+        draw: float = rng.random() * self._cumulativeMix[-1]
+        return bisect.bisect(self._cumulativeMix, draw)
 
     # -----
     # _produce_sms
     # -----
-    def _produce_sms(self, nMessages: int, msgQueue: mp.Queue) -> None:
+    def _produce_sms(self, nMessages: int, msgQueue: MessageLanes) -> None:
         """
         Generates a random sms message and random phone number the sms will be
         sent to. Currently, each number gets a different randomly generated
@@ -85,13 +183,42 @@ class SmsProducer(mp.Process):
         nMessages : int
             The number of sms messages to be generated.
 
-        msgQueue : mp.Queue
+        msgQueue : MessageLanes
             The production queue holding the generated sms messages that are ready
             to be sent out.
         """
-        for _ in range(nMessages):
-            sms: Dict[str, str] = {
-                self._generate_phone_number(): self._generate_message()
+        init_worker_signals()
+        start_accounting(self._resourceQueue)
+
+        rng: random.Random = make_rng(self._seed, self.name)
+        trace: TraceWriter | None = (
+            TraceWriter(self._tracePath, self._traceStart)
+            if self._tracePath is not None
+            else None
+        )
+
+        for msgId in range(nMessages):
+            if self._stopEvent is not None and self._stopEvent.is_set():
+                break
+
+            sms: Dict[str, str | int | float] = {
+                "id": msgId,
+                "to": self._generate_phone_number(rng),
+                "body": self._generate_message(rng),
+                "priority": self._generate_priority(rng),
+                "enqueuedAt": time.time(),
             }
 
             msgQueue.put_nowait(sms)
+
+            if trace is not None:
+                trace.write_message(sms)
+
+            # Only the producer writes to this, so no lock is needed
+            if self._producedCount is not None:
+                self._producedCount.value += 1
+
+        if trace is not None:
+            trace.close()
+
+        report_usage(self._resourceQueue, self.name)
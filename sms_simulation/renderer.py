@@ -0,0 +1,168 @@
+import math
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from progress.spinner import Spinner  # type: ignore
+
+
+# ============================================
+#              ProgressRenderer
+# ============================================
+class ProgressRenderer(threading.Thread):
+    """
+    Displays progress information to the user via stdout.
+
+    Runs as a daemon thread in the monitor process so that writing to a slow
+    terminal never holds up the collection of responses. Every update works
+    from a snapshot of the monitor's state rather than the live counters.
+
+    Parameters
+    ----------
+    snapshot : Callable[[], Dict[str, float]]
+        Returns a copy of the monitor's current state.
+
+    nMessages : int
+        The total number of messages being sent.
+
+    progUpdateTime : float
+        The time, in seconds, between progress refreshes.
+
+    mode : str
+        'tty' redraws the display in-place, 'plain' prints one line per update
+        (suitable for logs and pipes), and 'quiet' prints nothing.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self,
+        snapshot: Callable[[], Dict[str, float]],
+        nMessages: int,
+        progUpdateTime: float,
+        mode: str,
+    ) -> None:
+        self._snapshot: Callable[[], Dict[str, float]] = snapshot
+        self._nMessages: int = nMessages
+        self._progUpdateTime: float = progUpdateTime
+        self._mode: str = mode
+
+        self._stopEvent: threading.Event = threading.Event()
+        self._startTime: float = time.monotonic()
+
+        super().__init__(name="renderer", daemon=True)
+
+    # -----
+    # run
+    # -----
+    def run(self) -> None:
+        if self._mode == "quiet":
+            return
+
+        spinner: Spinner | None = Spinner() if self._mode == "tty" else None
+        self._startTime = time.monotonic()
+
+        while not self._stopEvent.wait(self._progUpdateTime):
+            self._render(self._snapshot(), spinner)
+
+    # -----
+    # stop
+    # -----
+    def stop(self) -> None:
+        """
+        Stops the periodic updates and displays the final state.
+
+        In tty mode this also leaves the cursor below the display so that
+        subsequent output does not overwrite it.
+        """
+        self._stopEvent.set()
+        if self.is_alive():
+            self.join()
+
+        if self._mode != "quiet":
+            self._render(self._snapshot())
+
+    # -----
+    # _render
+    # -----
+    def _render(self, state: Dict[str, float], spinner: Spinner | None = None) -> None:
+        """
+        Writes a single update for the given snapshot.
+
+        Parameters
+        ----------
+        state : Dict[str, float]
+            The snapshot of the monitor's state to display.
+
+        spinner : Spinner | None
+            Advanced and the display is drawn in-place when given. The final
+            update is drawn without one.
+        """
+        lines: List[str] = self._format(state)
+
+        if self._mode == "plain":
+            elapsed: float = time.monotonic() - self._startTime
+            print(f"[{elapsed:.1f}s] " + ", ".join(lines), flush=True)
+            return
+
+        print("\n".join(lines))
+
+        if spinner:
+            spinner.next()
+            self._move_cursor_up(len(lines))
+        else:
+            # Clear the spinner's line
+            print("\033[K", end="", flush=True)
+
+    # -----
+    # _format
+    # -----
+    def _format(self, state: Dict[str, float]) -> List[str]:
+        """
+        Builds the lines of the display.
+
+        Parameters
+        ----------
+        state : Dict[str, float]
+            The snapshot of the monitor's state to display.
+
+        Returns
+        -------
+        List[str]
+            One entry per line of the display.
+        """
+        # Avoid division by zero errors
+        avgTime: float | str = "N/A"
+
+        if state["messagesSent"] > 0:
+            avgTime = round(state["totalSendTime"] / state["messagesSent"], 2)
+
+        rate: str = "N/A" if math.isnan(state["rate"]) else f"{state['rate']:.2f}"
+        eta: str = "N/A" if math.isnan(state["eta"]) else f"{state['eta']:.1f}s"
+
+        return [
+            "Number of messages sent: "
+            f"{int(state['messagesSent'])} / {self._nMessages}",
+            f"Number of messages failed: {int(state['failedSends'])}",
+            f"Average time per message: {avgTime}",
+            f"Messages per second: {rate}",
+            f"Estimated time remaining: {eta}",
+        ]
+
+    # -----
+    # _move_cursor_up
+    # -----
+    def _move_cursor_up(self, nLines: int) -> None:
+        """
+        Keeps the updated display "in-place" by using the ascii code
+        to move the cursor up the desired number of lines.
+
+        Parameters
+        ----------
+        nLines : int
+            The number of lines by which to move up the cursor.
+        """
+        print("\033[F" * nLines, end="", flush=True)
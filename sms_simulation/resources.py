@@ -0,0 +1,249 @@
+import math
+import os
+import queue
+import sys
+import tracemalloc
+from types import ModuleType
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from sms_simulation.constants import MAX_USAGE_ROWS
+
+# getrusage is POSIX-only; without it the CPU time is reported as NaN
+resource: ModuleType | None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux but in bytes on macOS
+_MAXRSS_UNIT: int = 1 if sys.platform == "darwin" else 1024
+
+
+# ============================================
+#              start_accounting
+# ============================================
+def start_accounting(resourceQueue: queue.Queue | None) -> None:
+    """
+    Starts tracing Python allocations so that the peak can be reported at
+    exit. Tracing slows allocation down, so it is only turned on when the
+    usage is being collected.
+
+    Parameters
+    ----------
+    resourceQueue : mp.Queue | None
+        Where the usage is reported. If None, nothing is done.
+    """
+    if resourceQueue is not None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+# ============================================
+#                report_usage
+# ============================================
+def report_usage(resourceQueue: queue.Queue | None, procName: str) -> None:
+    """
+    Samples the calling process's usage and puts it on the resource queue.
+    Called by each worker process just before it exits.
+
+    Parameters
+    ----------
+    resourceQueue : mp.Queue | None
+        Where the usage is reported. If None, nothing is done.
+
+    procName : str
+        The name the usage is reported under.
+    """
+    if resourceQueue is not None:
+        resourceQueue.put(sample_usage(procName))
+
+
+# ============================================
+#                sample_usage
+# ============================================
+def sample_usage(procName: str) -> Dict[str, str | float]:
+    """
+    Samples the calling process's CPU time, resident memory, peak resident
+    memory, and peak Python allocation.
+
+    Parameters
+    ----------
+    procName : str
+        The name the usage is reported under.
+
+    Returns
+    -------
+    Dict[str, str | float]
+        The usage. Memory is in bytes and CPU time in seconds. Anything that
+        cannot be measured on this platform (or, for the peak allocation,
+        because tracing is off) is NaN.
+    """
+    rss, peakRss = _read_memory("self")
+    cpuTime: float = math.nan
+
+    if resource is not None:
+        usage: resource.struct_rusage = resource.getrusage(resource.RUSAGE_SELF)
+        cpuTime = usage.ru_utime + usage.ru_stime
+
+        # ru_maxrss carries over the parent's peak across fork and exec, so it
+        # is only used where the process's own peak is not available
+        if math.isnan(peakRss):
+            peakRss = float(usage.ru_maxrss * _MAXRSS_UNIT)
+
+    return {
+        "name": procName,
+        "cpuTime": cpuTime,
+        "rss": rss,
+        "peakRss": peakRss,
+        "peakAlloc": (
+            float(tracemalloc.get_traced_memory()[1])
+            if tracemalloc.is_tracing()
+            else math.nan
+        ),
+    }
+
+
+# ============================================
+#            sample_process_usage
+# ============================================
+def sample_process_usage(pid: int, procName: str) -> Dict[str, str | float]:
+    """
+    Samples another process's usage from the outside, for processes that do
+    not report their own (i.e., the process manager). Relies on /proc, so
+    everything is NaN on platforms without it. The peak Python allocation is
+    never available this way.
+
+    Parameters
+    ----------
+    pid : int
+        The process to sample.
+
+    procName : str
+        The name the usage is reported under.
+
+    Returns
+    -------
+    Dict[str, str | float]
+        The usage, in the same form as sample_usage.
+    """
+    rss, peakRss = _read_memory(str(pid))
+    cpuTime: float = math.nan
+
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as stat:
+            # The command name can contain spaces, so count from the end of it
+            fields: List[str] = stat.read().rsplit(")", 1)[1].split()
+        # utime and stime are the 14th and 15th fields of stat
+        cpuTime = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        pass
+
+    return {
+        "name": procName,
+        "cpuTime": cpuTime,
+        "rss": rss,
+        "peakRss": peakRss,
+        "peakAlloc": math.nan,
+    }
+
+
+# ============================================
+#               collect_usage
+# ============================================
+def collect_usage(resourceQueue: queue.Queue) -> List[Dict[str, str | float]]:
+    """
+    Takes every usage report that has been put on the resource queue.
+    """
+    usages: List[Dict[str, str | float]] = []
+
+    while True:
+        try:
+            usages.append(resourceQueue.get_nowait())
+        except queue.Empty:
+            return usages
+
+
+# ============================================
+#                format_usage
+# ============================================
+def format_usage(usages: List[Dict[str, str | float]]) -> List[str]:
+    """
+    Lays out the usage of each process as a table.
+
+    Senders (or, with the thread backend, worker processes) are listed one by
+    one when there are only a few of them. Otherwise they are summarized by
+    their total and the single largest value in each column.
+
+    Parameters
+    ----------
+    usages : List[Dict[str, str | float]]
+        The usage of each process, as returned by sample_usage.
+
+    Returns
+    -------
+    List[str]
+        The lines of the table.
+    """
+    senders: List[Dict[str, str | float]] = sorted(
+        (u for u in usages if str(u["name"]).startswith(("sender_", "worker_"))),
+        key=lambda u: int(str(u["name"]).rsplit("_", 1)[1]),
+    )
+    rows: List[Dict[str, str | float]] = [u for u in usages if u not in senders]
+
+    if len(senders) <= MAX_USAGE_ROWS:
+        rows.extend(senders)
+    else:
+        for label, combine in (("total", math.fsum), ("max", max)):
+            row: Dict[str, str | float] = {"name": f"senders {label}"}
+            for key in ("cpuTime", "rss", "peakRss", "peakAlloc"):
+                row[key] = combine(float(u[key]) for u in senders)
+            rows.append(row)
+
+    lines: List[str] = [
+        f"{'Process':<16} {'CPU (s)':>9} {'RSS (MB)':>10} "
+        f"{'Peak RSS (MB)':>14} {'Peak alloc (MB)':>16}"
+    ]
+
+    for row in rows:
+        lines.append(
+            f"{row['name']:<16} {_format_value(row['cpuTime'], 1.0):>9} "
+            f"{_format_value(row['rss'], 2**20):>10} "
+            f"{_format_value(row['peakRss'], 2**20):>14} "
+            f"{_format_value(row['peakAlloc'], 2**20):>16}"
+        )
+
+    return lines
+
+
+# ============================================
+#               _format_value
+# ============================================
+def _format_value(value: str | float, scale: float) -> str:
+    value = float(value)
+    return "n/a" if math.isnan(value) else f"{value / scale:.2f}"
+
+
+# ============================================
+#                _read_memory
+# ============================================
+def _read_memory(pid: str) -> Tuple[float, float]:
+    """
+    Reads the current and peak resident memory, in bytes, of the given process
+    ("self" for the calling one). Both are NaN on platforms without /proc.
+    """
+    rss: float = math.nan
+    peakRss: float = math.nan
+
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key == "VmRSS":
+                    rss = float(int(value.split()[0]) * 1024)
+                elif key == "VmHWM":
+                    peakRss = float(int(value.split()[0]) * 1024)
+    except OSError:
+        pass
+
+    return rss, peakRss
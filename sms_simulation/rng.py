@@ -0,0 +1,163 @@
+import array
+import math
+import random
+import sys
+from typing import Iterator
+from typing import List
+
+from sms_simulation.constants import RNG_BLOCK_SIZE
+
+
+# ============================================
+#                  make_rng
+# ============================================
+def make_rng(seed: int | None, streamName: str) -> random.Random:
+    """
+    Creates the random number generator for a single named stream.
+
+    Every process (and every sender thread) draws from its own stream. When a
+    seed is given, each stream is derived from the seed and the stream's name,
+    so the streams are independent of one another and identical from one run
+    to the next. Without a seed, each stream is seeded from the OS.
+
+    Parameters
+    ----------
+    seed : int | None
+        The seed for the whole simulation, or None for unseeded streams.
+
+    streamName : str
+        The unique name of the stream, e.g., the name of the process.
+
+    Returns
+    -------
+    random.Random
+        The generator for the stream.
+    """
+    if seed is None:
+        return random.Random()
+
+    # String seeds are hashed with sha512, so, unlike hash(), the result does
+    # not change between interpreter runs
+    return random.Random(f"{seed}:{streamName}")
+
+
+# Sets the top four bits of a byte, when used with bytes.translate
+_SET_HIGH_BITS: bytes = bytes(b | 0xF0 for b in range(256))
+
+
+# ============================================
+#                BlockSampler
+# ============================================
+class BlockSampler:
+    """
+    Hands out random draws one at a time from blocks that are generated in bulk.
+
+    A block of uniform draws comes from a single randbytes call. The random
+    bytes are turned into doubles in [1, 2) by overwriting their sign and
+    exponent bits with slice assignments, so no Python code runs per value,
+    and 1 is taken off as each draw is handed out. A block of normal draws is
+    made from a block of uniform draws with the Box-Muller transform, which
+    gives two draws per pair. Handing out a draw is then a single next() on
+    the block rather than a call into random.Random.
+
+    Each kind of draw has its own generator, so the sequence of values of one
+    kind does not depend on how the calls are interleaved with the other kind
+    or on the block size.
+
+    Parameters
+    ----------
+    seed : int | None
+        The seed for the whole simulation, or None for unseeded streams.
+
+    streamName : str
+        The unique name of the stream, e.g., the name of the sender.
+
+    blockSize : int
+        The number of values generated each time a block runs out.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self, seed: int | None, streamName: str, blockSize: int = RNG_BLOCK_SIZE
+    ) -> None:
+        self._blockSize: int = blockSize
+
+        self._gaussRng: random.Random = make_rng(seed, f"{streamName}:gauss")
+        self._uniformRng: random.Random = make_rng(seed, f"{streamName}:uniform")
+
+        self._gaussBlock: Iterator[float] = iter(())
+        self._uniformBlock: Iterator[float] = iter(())
+
+    # -----
+    # gauss
+    # -----
+    def gauss(self) -> float:
+        """
+        Returns the next draw from the standard normal distribution.
+        """
+        try:
+            return next(self._gaussBlock)
+        except StopIteration:
+            self._gaussBlock = iter(_gauss_block(self._gaussRng, self._blockSize))
+            return next(self._gaussBlock)
+
+    # -----
+    # uniform
+    # -----
+    def uniform(self) -> float:
+        """
+        Returns the next draw from the uniform distribution on [0, 1).
+        """
+        try:
+            return next(self._uniformBlock) - 1.0
+        except StopIteration:
+            self._uniformBlock = iter(_uniform_block(self._uniformRng, self._blockSize))
+            return next(self._uniformBlock) - 1.0
+
+
+# ============================================
+#               _uniform_block
+# ============================================
+def _uniform_block(rng: random.Random, size: int) -> array.array:
+    """
+    Draws size values uniformly from [1, 2) with a single call to rng.
+
+    Each value is eight random bytes read as a little-endian double. Setting
+    the top byte to 0x3F and the top four bits of the byte below it makes the
+    sign positive and the exponent zero, which leaves 52 random bits in the
+    mantissa. randbytes draws 32 bits at a time, so consecutive blocks are the
+    same as one large block.
+    """
+    data: bytearray = bytearray(rng.randbytes(8 * size))
+    data[7::8] = b"\x3f" * size
+    data[6::8] = data[6::8].translate(_SET_HIGH_BITS)
+
+    values: array.array = array.array("d", data)
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values
+
+
+# ============================================
+#                _gauss_block
+# ============================================
+def _gauss_block(rng: random.Random, size: int) -> List[float]:
+    """
+    Draws at least size values from the standard normal distribution by
+    applying the Box-Muller transform to pairs of uniform draws. size is
+    rounded up to an even number so that the pairs line up from one block to
+    the next.
+    """
+    uniforms: Iterator[float] = iter(_uniform_block(rng, size + size % 2))
+    values: List[float] = []
+
+    for first, second in zip(uniforms, uniforms):
+        # 2 - first is in (0, 1], so the logarithm is always defined
+        radius: float = math.sqrt(-2.0 * math.log(2.0 - first))
+        angle: float = math.tau * (second - 1.0)
+        values += (radius * math.cos(angle), radius * math.sin(angle))
+
+    return values
@@ -0,0 +1,336 @@
+import argparse
+import contextlib
+import math
+import multiprocessing as mp
+import os
+import queue
+from typing import Dict
+from typing import List
+
+from sms_simulation.args import _failure_float
+from sms_simulation.args import _get_parser as _get_run_parser
+from sms_simulation.args import _positive_int
+from sms_simulation.args import _time_float
+from sms_simulation.args import _validate_args as _validate_run_args
+from sms_simulation.constants import QUEUE_POLL_TIME
+from sms_simulation.fleet import SenderProfiles
+from sms_simulation.monitor import SmsMonitor
+from sms_simulation.throughput import estimate_deadline
+
+
+# ============================================
+#                    main
+# ============================================
+def main() -> int:
+    """
+    Entry point for the scale test.
+
+    Runs the simulation several times, multiplying the number of messages and
+    the number of senders by the same factor each step, so that every sender
+    has the same amount of work at every step. If everything scaled linearly,
+    the throughput would grow by the factor each step while the peak memory
+    grew no faster than that. Reports the first step at which either one falls
+    short of that by more than the tolerance.
+
+    Returns
+    -------
+    int
+        0 if every step ran successfully, -1 otherwise.
+    """
+    mp.set_start_method("spawn")
+
+    args: argparse.Namespace = _get_parser().parse_args()
+    steps: List[Dict[str, float]] = []
+
+    print(
+        f"{'Messages':>9} {'Senders':>8} {'Time (s)':>9} {'Msg/s':>9} "
+        f"{'Scaling':>8} {'Peak RSS (MB)':>14} {'Scaling':>8} {'CPU (s)':>8}"
+    )
+
+    for k in range(args.steps):
+        size: int = args.factor**k
+        step: Dict[str, float] | None = _run_step(
+            args.nMessages * size, args.nSenders * size, args
+        )
+
+        if step is None:
+            print(
+                f"Error: the run with {args.nMessages * size} messages and "
+                f"{args.nSenders * size} senders did not complete."
+            )
+            return -1
+
+        # How the step compares to the first one, relative to the size. Both
+        # are 1.0 for perfectly linear scaling
+        step["rateScaling"] = step["rate"] / steps[0]["rate"] / size if steps else 1.0
+        step["memoryScaling"] = (
+            step["peakRss"] / steps[0]["peakRss"] / size if steps else 1.0
+        )
+        steps.append(step)
+
+        print(
+            f"{int(step['nMessages']):>9} {int(step['nSenders']):>8} "
+            f"{step['elapsed']:>9.2f} {step['rate']:>9.1f} "
+            f"{step['rateScaling']:>8.2f} {step['peakRss'] / 2**20:>14.1f} "
+            f"{step['memoryScaling']:>8.2f} {step['cpuTime']:>8.2f}"
+        )
+
+    print()
+    _report_limit(
+        steps,
+        "Throughput",
+        [s["rateScaling"] < 1.0 - args.tolerance for s in steps],
+    )
+    _report_limit(
+        steps,
+        "Memory",
+        [s["memoryScaling"] > 1.0 + args.tolerance for s in steps],
+    )
+
+    return 0
+
+
+# ============================================
+#               _get_parser
+# ============================================
+def _get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="sms_simulation_scale",
+        description="Ramps up the number of messages and senders and reports "
+        "where memory or throughput stops scaling linearly.",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--n-messages",
+        default=100,
+        type=_positive_int,
+        dest="nMessages",
+        help="The number of SMS messages to send in the first step.",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--n-senders",
+        default=2,
+        type=_positive_int,
+        dest="nSenders",
+        help="The number of senders in the first step.",
+    )
+
+    parser.add_argument(
+        "--steps",
+        default=4,
+        type=_positive_int,
+        dest="steps",
+        help="The number of steps to run.",
+    )
+
+    parser.add_argument(
+        "--factor",
+        default=2,
+        type=_positive_int,
+        dest="factor",
+        help="The number of messages and the number of senders are both "
+        "multiplied by this at each step.",
+    )
+
+    parser.add_argument(
+        "-t",
+        "--time-to-send",
+        default=0.05,
+        type=_time_float,
+        dest="timeToSend",
+        help="The mean send time, in seconds, of every sender.",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--backend",
+        default="process",
+        choices=["process", "thread"],
+        dest="backend",
+        help="How the senders are run, as for sms_simulation.",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--n-workers",
+        default=1,
+        type=_positive_int,
+        dest="nWorkers",
+        help="The number of worker processes used by the thread backend. This "
+        "stays the same at every step.",
+    )
+
+    parser.add_argument(
+        "--transport",
+        default="sleep",
+        choices=["sleep", "http"],
+        dest="transport",
+        help="How sending is simulated, as for sms_simulation.",
+    )
+
+    parser.add_argument(
+        "--tolerance",
+        default=0.25,
+        type=_failure_float,
+        dest="tolerance",
+        help="How far, as a fraction, the throughput may fall below, or the "
+        "peak memory rise above, linear scaling before it is reported.",
+    )
+
+    return parser
+
+
+# ============================================
+#                 _run_step
+# ============================================
+def _run_step(
+    nMessages: int, nSenders: int, args: argparse.Namespace
+) -> Dict[str, float] | None:
+    """
+    Runs the simulation once, in a fresh process, so that the peak memory of
+    one step does not carry over into the next.
+
+    Parameters
+    ----------
+    nMessages : int
+        The number of messages to send.
+
+    nSenders : int
+        The number of senders.
+
+    args : argparse.Namespace
+        The parsed command-line arguments passed to the scale test.
+
+    Returns
+    -------
+    Dict[str, float] | None
+        The size of the step, the time spent sending, the throughput, and the
+        peak memory and CPU time summed across every process, or None if the
+        run did not complete.
+    """
+    runArgv: List[str] = [
+        "-n",
+        str(nMessages),
+        "-s",
+        str(nSenders),
+        "-b",
+        args.backend,
+        "-w",
+        str(args.nWorkers),
+        "--transport",
+        args.transport,
+        "--resources",
+        "--progress",
+        "quiet",
+    ]
+
+    results: mp.Queue = mp.Queue()
+    proc: mp.Process = mp.Process(
+        target=_run_simulation,
+        args=(runArgv, args.timeToSend, results),
+        name="scale_step",
+    )
+    proc.start()
+
+    result: Dict[str, float | List[Dict[str, str | float]]] = {}
+
+    # Don't wait forever on a step that crashed before it could report
+    while not result and (proc.is_alive() or not results.empty()):
+        try:
+            result = results.get(timeout=QUEUE_POLL_TIME)
+        except queue.Empty:
+            continue
+
+    proc.join()
+
+    if not result or result["returnValue"] != 0:
+        return None
+
+    usage: List[Dict[str, str | float]] = result["usage"]
+
+    return {
+        "nMessages": float(nMessages),
+        "nSenders": float(nSenders),
+        "elapsed": result["elapsed"],
+        "rate": nMessages / result["elapsed"],
+        "peakRss": _total(usage, "peakRss"),
+        "cpuTime": _total(usage, "cpuTime"),
+    }
+
+
+# ============================================
+#              _run_simulation
+# ============================================
+def _run_simulation(
+    runArgv: List[str], timeToSend: float, results: queue.Queue
+) -> None:
+    """
+    The target function called by each step's process. Runs the simulation
+    quietly, with every sender sharing the same mean send time, and puts what
+    the monitor measured on the results queue.
+    """
+    parser: argparse.ArgumentParser = _get_run_parser()
+    runArgs: argparse.Namespace = _validate_run_args(parser.parse_args(runArgv), parser)
+    runArgs.profiles = SenderProfiles(
+        [
+            {
+                "count": runArgs.nSenders,
+                "mean": timeToSend,
+                "failureRate": parser.get_default("sendFailureRate"),
+            }
+        ]
+    )
+
+    # Keep the monitor's own messages out of the scale test's table
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            monitor: SmsMonitor = SmsMonitor(runArgs)
+            returnValue: int = monitor.run(
+                estimate_deadline(runArgs.nMessages, runArgs.profiles)
+            )
+
+    results.put(
+        {
+            "returnValue": returnValue,
+            "elapsed": monitor.elapsed,
+            "usage": monitor.resourceUsage,
+        }
+    )
+
+
+# ============================================
+#                  _total
+# ============================================
+def _total(usage: List[Dict[str, str | float]], key: str) -> float:
+    """
+    Sums one measurement across every process, skipping any process it could
+    not be measured for.
+    """
+    return math.fsum(float(u[key]) for u in usage if not math.isnan(float(u[key])))
+
+
+# ============================================
+#               _report_limit
+# ============================================
+def _report_limit(
+    steps: List[Dict[str, float]], measure: str, isNonLinear: List[bool]
+) -> None:
+    """
+    Reports the first step at which the given measure stopped scaling
+    linearly, if any.
+    """
+    for step, nonLinear in zip(steps, isNonLinear):
+        if nonLinear:
+            print(
+                f"{measure} stops scaling linearly at {int(step['nMessages'])} "
+                f"messages and {int(step['nSenders'])} senders."
+            )
+            return
+
+    print(
+        f"{measure} scales linearly up to {int(steps[-1]['nMessages'])} messages "
+        f"and {int(steps[-1]['nSenders'])} senders."
+    )
@@ -1,12 +1,22 @@
-import math
+import ctypes
 import multiprocessing as mp
+import multiprocessing.synchronize
 import queue
-import random
 import time
+from typing import Callable
 from typing import Dict
+from typing import List
+from typing import Tuple
 
-from sms_simulation.constants import SEND_SIGMA
+from sms_simulation.constants import QUEUE_POLL_TIME
 from sms_simulation.constants import SENTINEL
+from sms_simulation.fleet import SenderProfile
+from sms_simulation.gateway import GatewayClient
+from sms_simulation.lanes import MessageLanes
+from sms_simulation.resources import report_usage
+from sms_simulation.resources import start_accounting
+from sms_simulation.rng import BlockSampler
+from sms_simulation.shutdown import init_worker_signals
 
 
 # ============================================
@@ -19,21 +29,35 @@ class SmsSender(mp.Process):
 
     Parameters
     ----------
-    timeToSend : float
-        The mean number of seconds the worker should sleep for. Simulates how long
-        it takes to physically send out the sms.
+    profile : SenderProfile
+        How long the worker takes to physically send out each sms (simulated
+        with a sleep), how likely each send is to fail, and how many sends it
+        may make per second.
 
-    sendFailureRate : float
-        The percentage chance (as a decimal between 0.0 and 1.) that the current
-        sms will fail to send.
-
-    msgQueue : mp.Queue
+    msgQueue : MessageLanes
         The production queue holding the generated sms messages that are ready
         to be sent out.
 
     responseQueue : mp.Queue
         After a worker sends (or fails to send) a message, it puts information
         about the sending into this queue to be aggregated by the monitor.
+
+    seed : int | None
+        The seed for the whole simulation. The sender's random stream is derived
+        from it and the sender's name. If None, the stream is not reproducible.
+
+    stopEvent : mp.Event | None
+        When set, the sender stops taking new messages and quits.
+
+    gatewayPort : mp.RawValue | None
+        The port of the mock gateway. If given, messages are submitted to the
+        gateway over HTTP instead of being sent with a sleep.
+
+    gatewayBatch : int
+        The most messages submitted to the gateway in a single request.
+
+    resourceQueue : mp.Queue | None
+        If given, the sender's resource usage is put on this queue at exit.
     """
 
     # -----
@@ -41,16 +65,24 @@ class SmsSender(mp.Process):
     # -----
     def __init__(
         self,
-        timeToSend: float,
-        sendFailureRate: float,
-        msgQueue: queue.Queue,
+        profile: SenderProfile,
+        msgQueue: MessageLanes,
         responseQueue: queue.Queue,
         procName: str,
+        seed: int | None = None,
+        stopEvent: mp.synchronize.Event | None = None,
+        gatewayPort: ctypes.c_int | None = None,
+        gatewayBatch: int = 1,
+        resourceQueue: queue.Queue | None = None,
     ) -> None:
-        self._timeToSend: float = timeToSend
-        self._sendFailureRate: float = sendFailureRate
-        self._msgQueue: queue.Queue = msgQueue
+        self._profile: SenderProfile = profile
+        self._msgQueue: MessageLanes = msgQueue
         self._responseQueue: queue.Queue = responseQueue
+        self._seed: int | None = seed
+        self._stopEvent: mp.synchronize.Event | None = stopEvent
+        self._gatewayPort: ctypes.c_int | None = gatewayPort
+        self._gatewayBatch: int = gatewayBatch
+        self._resourceQueue: queue.Queue | None = resourceQueue
 
         super().__init__(
             target=self._send_sms,
@@ -61,18 +93,21 @@ class SmsSender(mp.Process):
     # -----
     # _send_sms
     # -----
-    def _send_sms(self, msgQueue: mp.Queue, responseQueue: mp.Queue) -> None:
+    def _send_sms(self, msgQueue: MessageLanes, responseQueue: mp.Queue) -> None:
         """
         The target function called by the worker process.
 
         In an infinite loop, checks for new messages ready to be sent, simulates
-        sending them via a sleep, and then sends its response back to the monitor.
+        sending them via a sleep (or submitting them to the mock gateway), and
+        then sends its responses back to the monitor. A send that raises is
+        reported as a failed send.
         If the worker process receives a sentinel value, it means that all of the
-        messages have been handled, so we quit.
+        messages have been handled, so we quit. We also quit, without taking
+        another message, once the stop event is set.
 
         Parameters
         ----------
-        msgQueue : mp.Queue
+        msgQueue : MessageLanes
             The production queue holding the generated sms messages that are ready
             to be sent out.
 
@@ -80,25 +115,246 @@ class SmsSender(mp.Process):
             After a worker sends (or fails to send) a message, it puts information
             about the sending into this queue to be aggregated by the monitor.
         """
+        init_worker_signals()
+        start_accounting(self._resourceQueue)
+
+        sampler: BlockSampler = BlockSampler(self._seed, self.name)
+        limiter: RateLimiter = RateLimiter(self._profile.rateLimit)
+        client: GatewayClient | None = None
+
+        if self._gatewayPort is not None:
+            client = GatewayClient(self._gatewayPort.value)
+
         while True:
+            if self._stopEvent is not None and self._stopEvent.is_set():
+                break
+
             try:
-                sms: Dict[str, str] = msgQueue.get_nowait()
+                sms: Dict[str, str | int | float] = msgQueue.get(
+                    timeout=QUEUE_POLL_TIME
+                )
             except queue.Empty:
                 continue
 
             if sms == SENTINEL:
                 break
 
-            # We take the absolute value here in order to avoid passing a
-            # negative value to sleep
-            sendTime: float = math.fabs(
-                random.normalvariate(mu=self._timeToSend, sigma=SEND_SIGMA)
-            )
-            time.sleep(sendTime)
-            sendSuccessful: bool = random.uniform(0.0, 1.0) > self._sendFailureRate
-            response: Dict[str, float | bool] = {
-                "successful": sendSuccessful,
-                "timeToSend": sendTime,
-            }
-
-            responseQueue.put_nowait(response)
+            batch: List[Dict[str, str | int | float]] = [sms]
+            sawSentinel: bool = False
+
+            if client is not None:
+                batch, sawSentinel = take_batch(
+                    sms, msgQueue.get_nowait, self._gatewayBatch
+                )
+
+            limiter.wait(len(batch))
+            startTime: float = time.time()
+
+            try:
+                if client is None:
+                    responses: List[Dict[str, str | float | bool]] = [
+                        simulate_send(self.name, sms, sampler, self._profile)
+                    ]
+                else:
+                    responses = client.send(self.name, batch, self._profile)
+            except Exception:  # pylint: disable=broad-exception-caught
+                responses = failed_responses(self.name, batch, startTime)
+
+            for response in responses:
+                responseQueue.put_nowait(response)
+
+            if sawSentinel:
+                break
+
+        if client is not None:
+            client.close()
+
+        report_usage(self._resourceQueue, self.name)
+
+
+# ============================================
+#                simulate_send
+# ============================================
+def simulate_send(
+    senderName: str,
+    sms: Dict[str, str | int | float],
+    sampler: BlockSampler,
+    profile: SenderProfile,
+) -> Dict[str, str | float | bool]:
+    """
+    Simulates physically sending a single sms by sleeping for a randomly drawn
+    amount of time and then randomly deciding whether or not the send failed.
+    Messages replayed from a trace carry the send time and outcome drawn in
+    the recorded run, and those are used instead.
+
+    Parameters
+    ----------
+    senderName : str
+        The name of the sender sending the message.
+
+    sms : Dict[str, str | int | float]
+        The message record being sent.
+
+    sampler : BlockSampler
+        The source of random draws owned by the calling sender.
+
+    profile : SenderProfile
+        The sender's profile, which the send time and outcome are drawn from.
+
+    Returns
+    -------
+    response : Dict[str, str | float | bool]
+        Information about the send to be aggregated by the monitor.
+    """
+    queueWait: float = time.time() - sms["enqueuedAt"]
+
+    # A replayed message carries the draws from the recorded run
+    if "sendTime" in sms:
+        sendTime: float = sms["sendTime"]
+        sendSuccessful: bool = sms["successful"]
+    else:
+        sendTime, sendSuccessful = profile.draw(sampler)
+
+    time.sleep(sendTime)
+    response: Dict[str, str | float | bool] = {
+        "id": sms["id"],
+        "sender": senderName,
+        "successful": sendSuccessful,
+        "timeToSend": sendTime,
+        "priority": sms["priority"],
+        "queueWait": queueWait,
+    }
+
+    return response
+
+
+# ============================================
+#              failed_responses
+# ============================================
+def failed_responses(
+    senderName: str, batch: List[Dict[str, str | int | float]], startTime: float
+) -> List[Dict[str, str | float | bool]]:
+    """
+    Builds the responses for a batch of messages whose send raised, e.g.,
+    because the gateway could not be reached. Every message in the batch is
+    reported as a failed send, so the monitor still accounts for it.
+
+    Parameters
+    ----------
+    senderName : str
+        The name of the sender that tried to send the batch.
+
+    batch : List[Dict[str, str | int | float]]
+        The message records that were being sent.
+
+    startTime : float
+        The wall-clock time at which the send was started.
+
+    Returns
+    -------
+    List[Dict[str, str | float | bool]]
+        The response for each message, in the same form as simulate_send.
+    """
+    sendTime: float = time.time() - startTime
+
+    return [
+        {
+            "id": sms["id"],
+            "sender": senderName,
+            "successful": False,
+            "timeToSend": sendTime,
+            "priority": sms["priority"],
+            "queueWait": startTime - sms["enqueuedAt"],
+        }
+        for sms in batch
+    ]
+
+
+# ============================================
+#                 take_batch
+# ============================================
+def take_batch(
+    first: Dict[str, str | int | float],
+    getNowait: Callable[[], Dict[str, str | int | float] | None],
+    batchSize: int,
+) -> Tuple[List[Dict[str, str | int | float]], bool]:
+    """
+    Builds a batch of messages to submit to the gateway together, starting
+    from a message that has already been taken. Only messages that are
+    already waiting are added; we never wait to fill a batch.
+
+    Parameters
+    ----------
+    first : Dict[str, str | int | float]
+        The message that starts the batch.
+
+    getNowait : Callable[[], Dict[str, str | int | float] | None]
+        Takes the next waiting message, raising queue.Empty if there is none.
+
+    batchSize : int
+        The most messages to put in the batch.
+
+    Returns
+    -------
+    batch : List[Dict[str, str | int | float]]
+        The messages to submit.
+
+    sawSentinel : bool
+        True if a sentinel was taken while building the batch, in which case
+        the caller should quit after submitting it.
+    """
+    batch: List[Dict[str, str | int | float]] = [first]
+
+    while len(batch) < batchSize:
+        try:
+            sms: Dict[str, str | int | float] | None = getNowait()
+        except queue.Empty:
+            break
+
+        if sms == SENTINEL:
+            return batch, True
+
+        batch.append(sms)
+
+    return batch, False
+
+
+# ============================================
+#                 RateLimiter
+# ============================================
+class RateLimiter:
+    """
+    Spaces out a sender's sends so that it never makes more than the given
+    number per second. Time spent waiting on the limiter counts towards a
+    message's queue wait.
+
+    Parameters
+    ----------
+    rate : float
+        The most sends allowed per second. 0 means no limit.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, rate: float) -> None:
+        self._interval: float = 1.0 / rate if rate > 0.0 else 0.0
+        self._nextTime: float = 0.0
+
+    # -----
+    # wait
+    # -----
+    def wait(self, nSends: int = 1) -> None:
+        """
+        Blocks until the next send is allowed and then reserves nSends sends.
+        """
+        if self._interval == 0.0:
+            return
+
+        now: float = time.monotonic()
+
+        if self._nextTime > now:
+            time.sleep(self._nextTime - now)
+            now = self._nextTime
+
+        self._nextTime = now + nSends * self._interval
@@ -0,0 +1,224 @@
+import multiprocessing as mp
+import multiprocessing.connection
+import signal
+import threading
+import time
+from types import FrameType
+from typing import Any
+from typing import Dict
+from typing import List
+
+from sms_simulation.constants import KILL_GRACE_TIME
+
+
+# ============================================
+#              init_worker_signals
+# ============================================
+def init_worker_signals() -> None:
+    """
+    Sets up signal handling in a child process.
+
+    Pressing Ctrl-C sends SIGINT to every process in the foreground group, so
+    the child processes (and the process manager) ignore it and leave it to
+    the monitor to shut them down in an orderly fashion. SIGTERM is reset to
+    its default in case the monitor's handler was inherited through a fork,
+    so that terminating a child always works.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+# ============================================
+#             ShutdownCoordinator
+# ============================================
+class ShutdownCoordinator:
+    """
+    Handles SIGINT and SIGTERM in the monitor and stops the process tree.
+
+    The first signal asks the monitor to shut down according to the policy:
+    'drain' lets the senders finish the messages they are working on, while
+    'abort' terminates every process straight away. A second signal always
+    escalates to 'abort'.
+
+    Parameters
+    ----------
+    policy : str
+        Either 'drain' or 'abort'.
+
+    timeout : float
+        The overall time, in seconds, to wait for the processes to exit on
+        their own before terminating them.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, policy: str, timeout: float) -> None:
+        self._policy: str = policy
+        self._timeout: float = timeout
+
+        self._signalName: str = ""
+        self._prevHandlers: Dict[int, Any] = {}
+
+    # -----
+    # requested
+    # -----
+    @property
+    def requested(self) -> bool:
+        """
+        True once a shutdown signal has been received.
+        """
+        return self._signalName != ""
+
+    # -----
+    # signalName
+    # -----
+    @property
+    def signalName(self) -> str:
+        """
+        The name of the first shutdown signal received, if any.
+        """
+        return self._signalName
+
+    # -----
+    # policy
+    # -----
+    @property
+    def policy(self) -> str:
+        """
+        The shutdown policy currently in effect.
+        """
+        return self._policy
+
+    # -----
+    # install
+    # -----
+    def install(self) -> None:
+        """
+        Installs the signal handlers. Signal handlers can only be set from the
+        main thread, so this does nothing anywhere else.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self._prevHandlers[signum] = signal.signal(signum, self._handle_signal)
+
+    # -----
+    # restore
+    # -----
+    def restore(self) -> None:
+        """
+        Puts back the signal handlers that were replaced by install.
+        """
+        for signum, handler in self._prevHandlers.items():
+            signal.signal(signum, handler)
+
+        self._prevHandlers = {}
+
+    # -----
+    # _handle_signal
+    # -----
+    def _handle_signal(self, signum: int, frame: FrameType | None) -> None:
+        # pylint: disable=unused-argument
+        if self.requested:
+            self._policy = "abort"
+        else:
+            self._signalName = signal.Signals(signum).name
+
+    # -----
+    # stop_processes
+    # -----
+    def stop_processes(self, procs: List[mp.Process], graceful: bool = True) -> int:
+        """
+        Waits for all of the given processes to exit at once, under a single
+        deadline, and then terminates (and, failing that, kills) any that are
+        left.
+
+        Parameters
+        ----------
+        procs : List[mp.Process]
+            The processes to stop. They should already have been told to quit.
+
+        graceful : bool
+            If False, or if the policy is 'abort', the processes are terminated
+            without waiting.
+
+        Returns
+        -------
+        int
+            0 if every process exited on its own with exit code 0, -1 otherwise.
+        """
+        returnValue: int = 0
+        pending: List[mp.Process] = [proc for proc in procs if proc.is_alive()]
+
+        if graceful and self._policy != "abort":
+            pending = self._wait(pending, self._timeout, abortable=True)
+
+        # Processes we had to stop are reported once here instead of by
+        # their exit codes below
+        stopped: List[mp.Process] = pending
+
+        if stopped:
+            names: str = ", ".join(proc.name for proc in stopped)
+            print(f"Error: processes not done: terminating {names}.")
+            returnValue = -1
+
+            for proc in stopped:
+                proc.terminate()
+            pending = self._wait(stopped, KILL_GRACE_TIME)
+
+            for proc in pending:
+                proc.kill()
+            self._wait(pending, KILL_GRACE_TIME)
+
+        for proc in procs:
+            # Processes that were never started have nothing to report
+            if proc in stopped or proc.pid is None or proc.exitcode == 0:
+                continue
+            print(f"Error: process {proc.name} failed with exit code: {proc.exitcode}")
+            returnValue = -1
+
+        return returnValue
+
+    # -----
+    # _wait
+    # -----
+    def _wait(
+        self, procs: List[mp.Process], timeout: float, abortable: bool = False
+    ) -> List[mp.Process]:
+        """
+        Waits for the given processes to exit in parallel.
+
+        Parameters
+        ----------
+        procs : List[mp.Process]
+            The processes to wait on.
+
+        timeout : float
+            The longest time, in seconds, to wait.
+
+        abortable : bool
+            If True, the wait ends early once the policy becomes 'abort'.
+
+        Returns
+        -------
+        List[mp.Process]
+            The processes that are still running.
+        """
+        deadline: float = time.monotonic() + timeout
+        pending: Dict[int, mp.Process] = {proc.sentinel: proc for proc in procs}
+
+        while pending:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0 or (abortable and self._policy == "abort"):
+                break
+
+            # Wake up periodically so that an escalation to abort is noticed
+            ready: List[Any] = multiprocessing.connection.wait(
+                list(pending), timeout=min(remaining, KILL_GRACE_TIME)
+            )
+            for sentinel in ready:
+                pending.pop(sentinel).join()
+
+        return list(pending.values())
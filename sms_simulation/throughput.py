@@ -0,0 +1,187 @@
+import math
+
+from sms_simulation.constants import DEADLINE_SAFETY_FACTOR
+from sms_simulation.constants import STALL_TIMEOUT_FLOOR
+from sms_simulation.constants import STARTUP_ALLOWANCE
+from sms_simulation.constants import THROUGHPUT_SAMPLE_TIME
+from sms_simulation.constants import THROUGHPUT_TIME_CONSTANT
+from sms_simulation.constants import TIMEOUT_BUFFER
+from sms_simulation.fleet import SenderProfiles
+
+
+# ============================================
+#             ThroughputEstimator
+# ============================================
+class ThroughputEstimator:
+    """
+    Keeps a running estimate of the number of messages handled per second.
+
+    The rate is an exponentially weighted moving average of the rate seen
+    between samples, so it follows changes in throughput without jumping
+    around on every message. Samples closer together than sampleTime are
+    ignored, which keeps the cost of calling update on every message low.
+
+    Parameters
+    ----------
+    timeConstant : float
+        The time, in seconds, over which old samples fade away.
+
+    sampleTime : float
+        The minimum time, in seconds, between samples.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self,
+        timeConstant: float = THROUGHPUT_TIME_CONSTANT,
+        sampleTime: float = THROUGHPUT_SAMPLE_TIME,
+    ) -> None:
+        self._timeConstant: float = timeConstant
+        self._sampleTime: float = sampleTime
+
+        self._rate: float = math.nan
+        self._prevCount: float = 0.0
+        self._prevTime: float | None = None
+
+    # -----
+    # rate
+    # -----
+    @property
+    def rate(self) -> float:
+        """
+        The estimated number of messages handled per second, or NaN if there
+        have not been enough samples yet.
+        """
+        return self._rate
+
+    # -----
+    # update
+    # -----
+    def update(self, count: float, now: float) -> None:
+        """
+        Records the number of messages handled so far.
+
+        Parameters
+        ----------
+        count : float
+            The total number of messages handled so far.
+
+        now : float
+            The current time, in seconds, from a monotonic clock.
+        """
+        if self._prevTime is None:
+            self._prevTime = now
+            self._prevCount = count
+            return
+
+        elapsed: float = now - self._prevTime
+
+        if elapsed < self._sampleTime:
+            return
+
+        sampleRate: float = (count - self._prevCount) / elapsed
+
+        if math.isnan(self._rate):
+            self._rate = sampleRate
+        else:
+            weight: float = 1.0 - math.exp(-elapsed / self._timeConstant)
+            self._rate += weight * (sampleRate - self._rate)
+
+        self._prevTime = now
+        self._prevCount = count
+
+    # -----
+    # eta
+    # -----
+    def eta(self, remaining: float) -> float:
+        """
+        Estimates the number of seconds needed to handle the remaining messages.
+
+        Parameters
+        ----------
+        remaining : float
+            The number of messages left to handle.
+
+        Returns
+        -------
+        float
+            The estimated time left, or NaN if the rate is not yet known or
+            is zero.
+        """
+        if math.isnan(self._rate) or self._rate <= 0.0:
+            return math.nan
+
+        return remaining / self._rate
+
+
+# ============================================
+#              estimate_deadline
+# ============================================
+def estimate_deadline(nMessages: int, profiles: SenderProfiles) -> float:
+    """
+    Derives the overall timeout for a run from the senders' profiles.
+
+    The senders work in parallel, so together they handle the sum of their
+    individual rates. The expected run time is scaled by a safety factor and
+    padded to allow for the processes starting up and for the slowest sender
+    finishing its last message.
+
+    Parameters
+    ----------
+    nMessages : int
+        The number of messages to send.
+
+    profiles : SenderProfiles
+        The profiles of every sender.
+
+    Returns
+    -------
+    float
+        The timeout, in seconds.
+    """
+    totalRate: float = 0.0
+    slowestMean: float = 0.0
+
+    # Every sender in a group has the same profile
+    for count, profile in profiles.iter_groups():
+        meanTime: float = profile.mean_time()
+        totalRate += count / meanTime
+        slowestMean = max(slowestMean, meanTime)
+
+    expectedTime: float = nMessages / totalRate
+
+    return (
+        DEADLINE_SAFETY_FACTOR * expectedTime
+        + slowestMean
+        + STARTUP_ALLOWANCE
+        + TIMEOUT_BUFFER
+    )
+
+
+# ============================================
+#            estimate_stall_timeout
+# ============================================
+def estimate_stall_timeout(profiles: SenderProfiles) -> float:
+    """
+    Derives how long the monitor may go without hearing from any sender before
+    the run is considered stalled.
+
+    Parameters
+    ----------
+    profiles : SenderProfiles
+        The profiles of every sender.
+
+    Returns
+    -------
+    float
+        The stall timeout, in seconds.
+    """
+    # Even the slowest sender should only rarely take longer than this over a
+    # single message
+    slowest: float = DEADLINE_SAFETY_FACTOR * max(
+        profile.slow_time() for _, profile in profiles.iter_groups()
+    )
+
+    return max(STALL_TIMEOUT_FLOOR, slowest + TIMEOUT_BUFFER)
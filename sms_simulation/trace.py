@@ -0,0 +1,326 @@
+import argparse
+import ctypes
+import gzip
+import json
+import multiprocessing as mp
+import multiprocessing.synchronize
+import os
+import queue
+import shutil
+import time
+from typing import Any
+from typing import Dict
+from typing import IO
+from typing import List
+from typing import Set
+from typing import Tuple
+
+from sms_simulation.constants import TRACE_VERSION
+from sms_simulation.fleet import SenderProfiles
+from sms_simulation.lanes import MessageLanes
+from sms_simulation.resources import report_usage
+from sms_simulation.resources import start_accounting
+from sms_simulation.shutdown import init_worker_signals
+
+# A trace is a gzip file of JSON lines. It is written in two parts, the messages
+# by the producer and the responses by the monitor, which are joined at the end
+# of the run; concatenated gzip members are still a valid gzip file.
+#
+# One line is the header. Every other line is a record whose first entry is its
+# kind. Enqueue times are offsets, in seconds, from the header's startTime:
+#
+#   ["m", id, priority, enqueuedAt, to, body]
+#   ["r", id, sender, timeToSend, successful]
+
+
+# ============================================
+#                 TraceWriter
+# ============================================
+class TraceWriter:
+    """
+    Writes one part of a trace.
+
+    Parameters
+    ----------
+    path : str
+        The file to write the part to.
+
+    startTime : float
+        The wall-clock time that the offsets in the trace are relative to.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(self, path: str, startTime: float) -> None:
+        self._startTime: float = startTime
+        self._file: IO[str] = gzip.open(path, "wt", encoding="utf-8")
+
+    # -----
+    # write_message
+    # -----
+    def write_message(self, sms: Dict[str, str | int | float]) -> None:
+        self._write(
+            [
+                "m",
+                sms["id"],
+                sms["priority"],
+                round(sms["enqueuedAt"] - self._startTime, 6),
+                sms["to"],
+                sms["body"],
+            ]
+        )
+
+    # -----
+    # write_response
+    # -----
+    def write_response(self, response: Dict[str, str | float | bool]) -> None:
+        self._write(
+            [
+                "r",
+                response["id"],
+                response["sender"],
+                response["timeToSend"],
+                response["successful"],
+            ]
+        )
+
+    # -----
+    # write_header
+    # -----
+    def write_header(self, header: Dict[str, Any]) -> None:
+        self._write({"version": TRACE_VERSION, "startTime": self._startTime, **header})
+
+    # -----
+    # close
+    # -----
+    def close(self) -> None:
+        self._file.close()
+
+    # -----
+    # _write
+    # -----
+    def _write(self, record: List[Any] | Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+
+# ============================================
+#               join_trace_parts
+# ============================================
+def join_trace_parts(path: str, parts: List[str]) -> None:
+    """
+    Joins the parts of a trace, in order, into the final trace file and
+    removes the parts. Missing parts (e.g., if the producer was killed before
+    it could write anything) are skipped.
+
+    Parameters
+    ----------
+    path : str
+        The final trace file.
+
+    parts : List[str]
+        The part files. The one holding the header must come first.
+    """
+    with open(path, "wb") as trace:
+        for part in parts:
+            if not os.path.exists(part):
+                continue
+            with open(part, "rb") as partFile:
+                shutil.copyfileobj(partFile, trace)
+            os.remove(part)
+
+
+# ============================================
+#                  read_trace
+# ============================================
+def read_trace(path: str) -> Tuple[Dict[str, Any], List[List[Any]], List[List[Any]]]:
+    """
+    Reads a whole trace.
+
+    Parameters
+    ----------
+    path : str
+        The trace file.
+
+    Returns
+    -------
+    header : Dict[str, Any]
+        The trace's header.
+
+    messages : List[List[Any]]
+        The message records, in the order they were produced.
+
+    responses : List[List[Any]]
+        The response records, in the order they were received.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a trace or is from an unsupported version.
+    """
+    header: Dict[str, Any] = {}
+    messages: List[List[Any]] = []
+    responses: List[List[Any]] = []
+
+    with gzip.open(path, "rt", encoding="utf-8") as trace:
+        try:
+            for line in trace:
+                record: List[Any] | Dict[str, Any] = json.loads(line)
+                if isinstance(record, dict):
+                    header = record
+                elif record[0] == "m":
+                    messages.append(record)
+                else:
+                    responses.append(record)
+        except EOFError:
+            # The producer's part is cut short if the recorded run was aborted
+            pass
+
+    if header.get("version") != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} trace.")
+
+    return header, messages, responses
+
+
+# ============================================
+#              apply_trace_header
+# ============================================
+def apply_trace_header(args: argparse.Namespace) -> None:
+    """
+    Replaces the run configuration with the one recorded in the trace being
+    replayed, so that the senders, deadline, and displays match the recorded
+    run. The senders' profiles are scaled by the replay speed.
+
+    Only the messages that were sent in the recorded run are replayed.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command-line arguments passed to the tool.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a trace or is from an unsupported version.
+    """
+    header, messages, responses = read_trace(args.replay)
+
+    sentIds: Set[int] = {record[1] for record in responses}
+    nReplayed: int = sum(1 for record in messages if record[1] in sentIds)
+
+    if nReplayed == 0:
+        raise ValueError(f"{args.replay} has no sent messages to replay.")
+
+    args.nMessages = nReplayed
+    args.profiles = SenderProfiles(header["fleet"]).scaled(args.replaySpeed)
+    args.nSenders = len(args.profiles)
+    args.priorityMix = header["priorityMix"]
+
+
+# ============================================
+#                TraceReplayer
+# ============================================
+class TraceReplayer(mp.Process):
+    """
+    Stands in for the producer by putting the messages from a trace back on the
+    production queue at the same (scaled) times as in the recorded run.
+
+    Each message carries the send time and outcome that were drawn for it in
+    the recorded run, and the senders and the gateway use those instead of
+    drawing new ones, so every replay of a trace sends the same workload
+    through the real transport and monitor.
+
+    Parameters
+    ----------
+    path : str
+        The trace file.
+
+    speed : float
+        How many times faster than real time to replay. Both the gaps between
+        the messages and their send times are divided by this.
+
+    msgQueue : MessageLanes
+        The production queue read by the senders.
+
+    stopEvent : mp.Event | None
+        When set, the replay stops early.
+
+    producedCount : mp.RawValue | None
+        Incremented after each message is put on the production queue.
+
+    resourceQueue : mp.Queue | None
+        If given, the replayer's resource usage is put on this queue at exit.
+    """
+
+    # -----
+    # constructor
+    # -----
+    def __init__(
+        self,
+        path: str,
+        speed: float,
+        msgQueue: MessageLanes,
+        procName: str,
+        stopEvent: mp.synchronize.Event | None = None,
+        producedCount: ctypes.c_longlong | None = None,
+        resourceQueue: queue.Queue | None = None,
+    ) -> None:
+        self._path: str = path
+        self._speed: float = speed
+        self._msgQueue: MessageLanes = msgQueue
+        self._stopEvent: mp.synchronize.Event | None = stopEvent
+        self._producedCount: ctypes.c_longlong | None = producedCount
+        self._resourceQueue: queue.Queue | None = resourceQueue
+
+        super().__init__(target=self._replay, name=procName)
+
+    # -----
+    # _replay
+    # -----
+    def _replay(self) -> None:
+        """
+        The target function called by the replay process.
+        """
+        init_worker_signals()
+        start_accounting(self._resourceQueue)
+
+        _, messages, responses = read_trace(self._path)
+
+        # Messages that were never sent in the recorded run have no send time
+        # to replay
+        draws: Dict[int, Tuple[float, bool]] = {
+            msgId: (sendTime, successful)
+            for _, msgId, _, sendTime, successful in responses
+        }
+
+        startTime: float = time.time()
+
+        for _, msgId, priority, enqueuedAt, to, body in messages:
+            if msgId not in draws:
+                continue
+
+            if self._stopEvent is not None and self._stopEvent.is_set():
+                break
+
+            delay: float = startTime + enqueuedAt / self._speed - time.time()
+            if delay > 0.0:
+                time.sleep(delay)
+
+            sendTime, successful = draws[msgId]
+            sms: Dict[str, str | int | float | bool] = {
+                "id": msgId,
+                "to": to,
+                "body": body,
+                "priority": priority,
+                "enqueuedAt": time.time(),
+                "sendTime": sendTime / self._speed,
+                "successful": successful,
+            }
+
+            self._msgQueue.put_nowait(sms)
+
+            if self._producedCount is not None:
+                self._producedCount.value += 1
+
+        report_usage(self._resourceQueue, self.name)
@@ -11,6 +11,7 @@ import pytest
 from sms_simulation.args import _positive_int
 from sms_simulation.args import _time_float
 from sms_simulation.args import _failure_float
+from sms_simulation.args import _share_float
 from sms_simulation.args import _squeeze_list
 
 
@@ -80,6 +81,18 @@ def test_failure_float_alpha_input(s: str) -> None:
         _failure_float(s)
 
 
+# ============================================
+#        test_share_float_numeric_input
+# ============================================
+@given(st.floats().map(str))
+def test_share_float_numeric_input(s: str) -> None:
+    if float(s) >= 0.0 and math.isfinite(float(s)):
+        assert float(s) == _share_float(s)
+    else:
+        with pytest.raises(argparse.ArgumentTypeError):
+            _share_float(s)
+
+
 # ============================================
 #             test_squeeze_list
 # ============================================
@@ -0,0 +1,193 @@
+import argparse
+import json
+import math
+from typing import Dict
+from typing import List
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from sms_simulation.args import _get_parser
+from sms_simulation.args import _validate_args
+from sms_simulation.constants import SEND_SIGMA
+from sms_simulation.fleet import load_fleet
+from sms_simulation.fleet import SenderProfile
+from sms_simulation.fleet import SenderProfiles
+from sms_simulation.monitor import SmsMonitor
+from sms_simulation.rng import BlockSampler
+from sms_simulation.throughput import estimate_deadline
+
+
+# ============================================
+#             test_profiles_lookup
+# ============================================
+@given(st.lists(st.integers(min_value=1, max_value=20), min_size=1, max_size=10))
+def test_profiles_lookup(counts: List[int]) -> None:
+    profiles: SenderProfiles = SenderProfiles(
+        [
+            {"count": c, "mean": float(i + 1), "failureRate": 0.1}
+            for i, c in enumerate(counts)
+        ]
+    )
+
+    assert len(profiles) == sum(counts)
+
+    # Every sender gets the profile of the group it falls in
+    expected: List[float] = [
+        float(i + 1) for i, c in enumerate(counts) for _ in range(c)
+    ]
+    assert [profiles[i].params[0] for i in range(len(profiles))] == expected
+
+    with pytest.raises(IndexError):
+        profiles[len(profiles)]
+
+
+# ============================================
+#            test_profiles_from_lists
+# ============================================
+def test_profiles_from_lists() -> None:
+    profiles: SenderProfiles = SenderProfiles.from_lists(
+        [0.1, 0.1, 0.2, 0.1], [0.5, 0.5, 0.5, 0.5]
+    )
+
+    assert [count for count, _ in profiles.iter_groups()] == [2, 1, 1]
+    assert profiles[3] == SenderProfile("normal", (0.1, SEND_SIGMA), 0.5, 0.0)
+
+
+# ============================================
+#               test_profile_draw
+# ============================================
+def test_profile_draw() -> None:
+    # A normal profile draws exactly as the senders always have
+    profile: SenderProfile = SenderProfile("normal", (0.3, SEND_SIGMA), 0.2, 0.0)
+    sampler: BlockSampler = BlockSampler(7, "sender_0")
+    reference: BlockSampler = BlockSampler(7, "sender_0")
+
+    for _ in range(100):
+        sendTime, successful = profile.draw(sampler)
+        assert sendTime == math.fabs(0.3 + SEND_SIGMA * reference.gauss())
+        assert successful == (reference.uniform() > 0.2)
+
+    uniform: SenderProfile = SenderProfile("uniform", (0.1, 0.2), 0.0, 0.0)
+    assert all(0.1 <= uniform.draw(sampler)[0] <= 0.2 for _ in range(100))
+    assert uniform.mean_time() == pytest.approx(0.15)
+
+    # The rate limit bounds how quickly messages can go out
+    limited: SenderProfile = SenderProfile("constant", (0.01, 0.0), 0.0, 2.0)
+    assert limited.mean_time() == pytest.approx(0.5)
+
+
+# ============================================
+#               test_load_fleet
+# ============================================
+def test_load_fleet(tmp_path) -> None:
+    tomlPath = tmp_path / "fleet.toml"
+    tomlPath.write_text(
+        "[[group]]\n"
+        "count = 1000\n"
+        'distribution = "exponential"\n'
+        "mean = 0.2\n"
+        "failureRate = 0.05\n"
+        "rateLimit = 10\n"
+        "\n"
+        "[[group]]\n"
+        "count = 2\n"
+        'distribution = "uniform"\n'
+        "low = 0.1\n"
+        "high = 0.3\n"
+        "failureRate = 0.0\n"
+    )
+    profiles: SenderProfiles = load_fleet(str(tomlPath))
+
+    # The same fleet, round-tripped through JSON
+    jsonPath = tmp_path / "fleet.json"
+    jsonPath.write_text(json.dumps({"group": profiles.groups()}))
+
+    assert load_fleet(str(jsonPath)).groups() == profiles.groups()
+    assert len(profiles) == 1002
+    assert profiles[999] == SenderProfile("exponential", (0.2, 0.0), 0.05, 10.0)
+    assert profiles[1000].distribution == "uniform"
+    assert profiles.scaled(2.0)[0] == SenderProfile(
+        "exponential", (0.1, 0.0), 0.05, 20.0
+    )
+
+
+# ============================================
+#               test_bad_fleets
+# ============================================
+@pytest.mark.parametrize(
+    "group",
+    [
+        {"count": 0, "mean": 0.1, "failureRate": 0.1},
+        {"count": 1, "failureRate": 0.1},
+        {"count": 1, "mean": 0.1},
+        {"count": 1, "mean": 0.1, "failureRate": 1.5},
+        {"count": 1, "mean": -0.1, "failureRate": 0.1},
+        {"count": 1, "mean": 0.1, "failureRate": 0.1, "rateLimit": -1},
+        {"count": 1, "mean": 0.1, "failureRate": 0.1, "sigm": 0.1},
+        {"count": 1, "distribution": "gamma", "mean": 0.1, "failureRate": 0.1},
+        {"count": 1, "distribution": "uniform", "low": 2, "high": 1, "failureRate": 0},
+        {"count": 1, "distribution": "constant", "mean": 0, "failureRate": 0},
+    ],
+)
+def test_bad_fleets(group: Dict[str, float | str]) -> None:
+    with pytest.raises(ValueError):
+        SenderProfiles([group])
+
+
+# ============================================
+#             test_fleet_conflicts
+# ============================================
+@pytest.mark.parametrize(
+    "options", [["-s", "4"], ["-t", "0.2"], ["-f", "0.5", "0.5"], ["-t"]]
+)
+def test_fleet_conflicts(tmp_path, options: List[str]) -> None:
+    fleetPath = tmp_path / "fleet.json"
+    fleetPath.write_text(
+        json.dumps({"group": [{"count": 2, "mean": 0.05, "failureRate": 0.1}]})
+    )
+
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args(["--fleet", str(fleetPath), *options])
+
+    # The per-sender options would otherwise be silently ignored
+    with pytest.raises(SystemExit):
+        _validate_args(args, parser)
+
+
+# ============================================
+#              test_monitor_fleet
+# ============================================
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_monitor_fleet(tmp_path, backend: str) -> None:
+    fleetPath = tmp_path / "fleet.json"
+    fleetPath.write_text(
+        json.dumps(
+            {
+                "group": [
+                    {"count": 2, "mean": 0.05, "failureRate": 0.1},
+                    {
+                        "count": 2,
+                        "distribution": "exponential",
+                        "mean": 0.05,
+                        "failureRate": 0.1,
+                        "rateLimit": 10,
+                    },
+                ]
+            }
+        )
+    )
+
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args(
+        ["-n", "20", "-w", "2", "-b", backend, "--fleet", str(fleetPath)]
+    )
+    args.progUpdateTime = 0.1
+    args = _validate_args(args, parser)
+
+    assert args.nSenders == 4
+
+    monitor: SmsMonitor = SmsMonitor(args)
+
+    assert monitor.run(estimate_deadline(args.nMessages, args.profiles)) == 0
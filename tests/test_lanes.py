@@ -0,0 +1,108 @@
+import queue
+import threading
+from typing import Any
+from typing import List
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from sms_simulation.constants import SENTINEL
+from sms_simulation.lanes import _build_schedule
+from sms_simulation.lanes import MessageLanes
+
+
+# ============================================
+#             test_build_schedule
+# ============================================
+@given(st.lists(st.integers(min_value=1, max_value=10), min_size=1, max_size=5))
+def test_build_schedule(weights: List[int]) -> None:
+    schedule: List[int] = _build_schedule(weights)
+
+    assert len(schedule) == sum(weights)
+    for lane, weight in enumerate(weights):
+        assert schedule.count(lane) == weight
+
+
+# ============================================
+#           test_lanes_no_starvation
+# ============================================
+def test_lanes_no_starvation() -> None:
+    lanes: MessageLanes = MessageLanes(
+        [queue.Queue() for _ in range(3)], [1.0, 1.0, 1.0], (3, 2, 1)
+    )
+
+    for priority in range(3):
+        for _ in range(10):
+            lanes.put_nowait({"priority": priority})
+
+    served: List[int] = [lanes.get_nowait()["priority"] for _ in range(6)]
+
+    # The high-priority lane comes first, but every lane gets a turn
+    assert served[0] == 0
+    assert sorted(served) == [0, 0, 0, 1, 1, 2]
+
+
+# ============================================
+#           test_lanes_fall_back
+# ============================================
+def test_lanes_fall_back() -> None:
+    lanes: MessageLanes = MessageLanes(
+        [queue.Queue() for _ in range(3)], [0.0, 1.0, 1.0]
+    )
+
+    lanes.put_nowait({"priority": 2})
+    lanes.put_nowait(SENTINEL)
+
+    # The sentinel goes on the highest-priority lane in use
+    assert lanes.get_nowait() == SENTINEL
+    assert lanes.get_nowait() == {"priority": 2}
+    assert lanes.qsize() == 0
+
+    with pytest.raises(queue.Empty):
+        lanes.get(timeout=0.01)
+
+
+# ============================================
+#            test_lanes_blocking_get
+# ============================================
+def test_lanes_blocking_get() -> None:
+    lanes: MessageLanes = MessageLanes(
+        [queue.Queue() for _ in range(3)], [1.0, 1.0, 1.0]
+    )
+
+    # A waiting consumer is woken up by a put on any lane
+    timer: threading.Timer = threading.Timer(
+        0.1, lanes.put_nowait, args=({"priority": 2},)
+    )
+    timer.start()
+
+    assert lanes.get(timeout=5.0) == {"priority": 2}
+    timer.join()
+
+    with pytest.raises(queue.Empty):
+        lanes.get_nowait()
+
+
+# ============================================
+#            test_lanes_late_message
+# ============================================
+class _LateQueue(queue.Queue):
+    # Like a multiprocessing queue, a put only shows up a moment later
+    def put_nowait(self, item: Any) -> None:
+        threading.Timer(0.05, super().put_nowait, args=(item,)).start()
+
+
+def test_lanes_late_message() -> None:
+    lanes: MessageLanes = MessageLanes(
+        [_LateQueue() for _ in range(3)], [1.0, 1.0, 1.0]
+    )
+
+    for priority in (2, 0):
+        lanes.put_nowait({"priority": priority})
+
+    # A message that has been counted is waited for rather than lost
+    assert sorted(lanes.get_nowait()["priority"] for _ in range(2)) == [0, 2]
+
+    with pytest.raises(queue.Empty):
+        lanes.get_nowait()
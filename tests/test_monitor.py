@@ -1,14 +1,20 @@
 import argparse
+import multiprocessing as mp
+import time
 from typing import List
 
 from hypothesis import given
 from hypothesis import settings
 import hypothesis.strategies as st
+import pytest
 
 from sms_simulation.args import _get_parser
 from sms_simulation.args import _validate_args
+from sms_simulation.constants import STARTUP_ALLOWANCE
 from sms_simulation.constants import TIMEOUT_BUFFER
+from sms_simulation.fleet import SenderProfiles
 from sms_simulation.monitor import SmsMonitor
+from sms_simulation.throughput import estimate_deadline
 
 
 # ============================================
@@ -33,7 +39,8 @@ def test_monitor(
     sendFailureRate: List[float],
     progUpdateTime: float,
 ) -> None:
-    args: argparse.Namespace = argparse.Namespace()
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args([])
 
     args.nMessages = nMessages
     args.nSenders = nSenders
@@ -41,7 +48,6 @@ def test_monitor(
     args.sendFailureRate = sendFailureRate
     args.progUpdateTime = progUpdateTime
 
-    parser = _get_parser()
     args = _validate_args(args, parser)
 
     monitor: SmsMonitor = SmsMonitor(args)
@@ -50,3 +56,106 @@ def test_monitor(
     returnValue: int = monitor.run(timeout)
 
     assert returnValue == 0
+
+
+# ============================================
+#          test_monitor_thread_backend
+# ============================================
+@settings(deadline=None, max_examples=10)
+@given(
+    st.integers(min_value=1, max_value=20),
+    st.integers(min_value=1, max_value=20),
+    st.integers(min_value=1, max_value=3),
+)
+def test_monitor_thread_backend(nMessages: int, nSenders: int, nWorkers: int) -> None:
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args([])
+
+    args.nMessages = nMessages
+    args.nSenders = nSenders
+    args.backend = "thread"
+    args.nWorkers = nWorkers
+    args.progUpdateTime = 0.1
+
+    args = _validate_args(args, parser)
+
+    monitor: SmsMonitor = SmsMonitor(args)
+
+    timeout: float = estimate_deadline(args.nMessages, args.profiles)
+    returnValue: int = monitor.run(timeout)
+
+    assert returnValue == 0
+
+
+# ============================================
+#          test_monitor_http_transport
+# ============================================
+@pytest.mark.parametrize("backend", ["process", "thread"])
+@pytest.mark.parametrize("gatewayBatch", [1, 4])
+def test_monitor_http_transport(backend: str, gatewayBatch: int) -> None:
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args([])
+
+    args.nMessages = 20
+    args.nSenders = 4
+    args.nWorkers = 2
+    args.backend = backend
+    args.transport = "http"
+    args.gatewayBatch = gatewayBatch
+    args.timeToSend = [0.05]
+    args.progUpdateTime = 0.1
+
+    args = _validate_args(args, parser)
+
+    monitor: SmsMonitor = SmsMonitor(args)
+
+    timeout: float = estimate_deadline(args.nMessages, args.profiles)
+    returnValue: int = monitor.run(timeout)
+
+    assert returnValue == 0
+
+
+# ============================================
+#          test_monitor_slow_startup
+# ============================================
+def test_monitor_slow_startup() -> None:
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args(["-n", "2", "-b", "thread"])
+    args.progUpdateTime = 0.1
+    args = _validate_args(args, parser)
+
+    # The first responses take longer than the stall timeout, which should
+    # not count against the run while the senders are starting up
+    args.profiles = SenderProfiles(
+        [{"count": 2, "distribution": "constant", "mean": 1.0, "failureRate": 0.0}]
+    )
+    args.nSenders = 2
+    args.stallTimeout = 0.5
+
+    monitor: SmsMonitor = SmsMonitor(args)
+
+    assert monitor.run(estimate_deadline(args.nMessages, args.profiles)) == 0
+
+
+# ============================================
+#          test_monitor_gateway_failure
+# ============================================
+def test_monitor_gateway_failure(monkeypatch) -> None:
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args(
+        ["-n", "10", "-s", "2", "-t", "0.05", "--transport", "http"]
+    )
+    args.progUpdateTime = 0.1
+    args = _validate_args(args, parser)
+
+    monitor: SmsMonitor = SmsMonitor(args)
+
+    # The gateway only ever signals the event it was given, so it never
+    # looks ready
+    monkeypatch.setattr("sms_simulation.monitor.GATEWAY_START_TIMEOUT", 0.1)
+    monitor._gatewayReady = mp.Event()  # pylint: disable=W0212
+
+    startTime: float = time.monotonic()
+
+    assert monitor.run(estimate_deadline(args.nMessages, args.profiles)) != 0
+    assert time.monotonic() - startTime < STARTUP_ALLOWANCE
@@ -0,0 +1,34 @@
+import math
+from typing import Dict
+
+import pytest
+
+from sms_simulation.renderer import ProgressRenderer
+
+
+# ============================================
+#            test_renderer_modes
+# ============================================
+@pytest.mark.parametrize("mode", ["plain", "quiet"])
+def test_renderer_modes(mode: str, capsys: pytest.CaptureFixture) -> None:
+    state: Dict[str, float] = {
+        "messagesSent": 4.0,
+        "failedSends": 1.0,
+        "totalSendTime": 2.0,
+        "rate": 2.0,
+        "eta": math.nan,
+    }
+
+    renderer: ProgressRenderer = ProgressRenderer(lambda: dict(state), 10, 0.01, mode)
+    renderer.start()
+    renderer.stop()
+
+    out: str = capsys.readouterr().out
+
+    if mode == "quiet":
+        assert out == ""
+    else:
+        lastLine: str = out.splitlines()[-1]
+        assert "4 / 10" in lastLine
+        assert "failed: 1" in lastLine
+        assert "\033" not in out
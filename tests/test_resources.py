@@ -0,0 +1,90 @@
+import argparse
+import math
+from typing import Dict
+from typing import List
+
+from sms_simulation.args import _get_parser
+from sms_simulation.args import _validate_args
+from sms_simulation.constants import MAX_USAGE_ROWS
+from sms_simulation.monitor import SmsMonitor
+from sms_simulation.resources import format_usage
+from sms_simulation.resources import sample_usage
+from sms_simulation.throughput import estimate_deadline
+
+
+# ============================================
+#              test_sample_usage
+# ============================================
+def test_sample_usage() -> None:
+    usage: Dict[str, str | float] = sample_usage("test")
+
+    assert usage["name"] == "test"
+    assert usage["cpuTime"] > 0.0
+    assert usage["peakRss"] > 0.0
+    assert math.isnan(usage["rss"]) or usage["rss"] <= usage["peakRss"]
+
+
+# ============================================
+#         test_sample_usage_no_rusage
+# ============================================
+def test_sample_usage_no_rusage(monkeypatch) -> None:
+    # Platforms without the resource module (i.e., Windows) report NaN
+    monkeypatch.setattr("sms_simulation.resources.resource", None)
+    usage: Dict[str, str | float] = sample_usage("test")
+
+    assert math.isnan(usage["cpuTime"])
+    assert format_usage([usage])
+
+
+# ============================================
+#          test_format_usage_summary
+# ============================================
+def test_format_usage_summary() -> None:
+    usages: List[Dict[str, str | float]] = [
+        {
+            "name": "manager",
+            "cpuTime": 1.0,
+            "rss": 1.0,
+            "peakRss": 1.0,
+            "peakAlloc": math.nan,
+        }
+    ]
+
+    for i in range(MAX_USAGE_ROWS + 1):
+        usages.append(
+            {
+                "name": f"sender_{i}",
+                "cpuTime": 1.0,
+                "rss": float(i * 2**20),
+                "peakRss": float(i * 2**20),
+                "peakAlloc": 0.0,
+            }
+        )
+
+    lines: List[str] = format_usage(usages)
+
+    # The header, the manager, and the senders' total and max
+    assert len(lines) == 4
+    assert "n/a" in lines[1]
+    assert lines[2].split()[:3] == ["senders", "total", f"{MAX_USAGE_ROWS + 1:.2f}"]
+    assert lines[3].split()[3] == f"{MAX_USAGE_ROWS:.2f}"
+
+
+# ============================================
+#           test_monitor_resources
+# ============================================
+def test_monitor_resources() -> None:
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args(
+        ["-n", "10", "-s", "2", "-t", "0.05", "0.05", "--resources"]
+    )
+    args.progUpdateTime = 0.1
+    args = _validate_args(args, parser)
+
+    monitor: SmsMonitor = SmsMonitor(args)
+    assert monitor.run(estimate_deadline(args.nMessages, args.profiles)) == 0
+
+    names: List[str] = sorted(str(u["name"]) for u in monitor.resourceUsage)
+
+    assert names == ["manager", "monitor", "producer", "sender_0", "sender_1"]
+    assert monitor.elapsed > 0.0
@@ -0,0 +1,74 @@
+import statistics
+from typing import List
+
+from hypothesis import given
+import hypothesis.strategies as st
+
+from sms_simulation.rng import BlockSampler
+from sms_simulation.rng import make_rng
+
+
+# ============================================
+#          test_make_rng_reproducible
+# ============================================
+@given(st.integers(), st.text())
+def test_make_rng_reproducible(seed: int, streamName: str) -> None:
+    first = make_rng(seed, streamName)
+    second = make_rng(seed, streamName)
+
+    assert [first.random() for _ in range(5)] == [second.random() for _ in range(5)]
+
+
+# ============================================
+#          test_make_rng_independent
+# ============================================
+@given(st.integers())
+def test_make_rng_independent(seed: int) -> None:
+    producer = make_rng(seed, "producer")
+    sender = make_rng(seed, "sender_0")
+
+    assert [producer.random() for _ in range(5)] != [sender.random() for _ in range(5)]
+
+
+# ============================================
+#     test_block_sampler_block_independent
+# ============================================
+@given(
+    st.integers(),
+    st.integers(min_value=1, max_value=10),
+    st.lists(st.booleans(), min_size=1, max_size=50),
+)
+def test_block_sampler_block_independent(
+    seed: int, blockSize: int, order: List[bool]
+) -> None:
+    # The gauss draws should not depend on the block size or on how they are
+    # interleaved with the uniform draws
+    small: BlockSampler = BlockSampler(seed, "sender_0", blockSize)
+    large: BlockSampler = BlockSampler(seed, "sender_0")
+
+    smallGauss: List[float] = []
+    for useGauss in order:
+        if useGauss:
+            smallGauss.append(small.gauss())
+        else:
+            assert 0.0 <= small.uniform() < 1.0
+
+    largeGauss: List[float] = [large.gauss() for _ in range(len(smallGauss))]
+
+    assert smallGauss == largeGauss
+
+
+# ============================================
+#       test_block_sampler_distributions
+# ============================================
+def test_block_sampler_distributions() -> None:
+    sampler: BlockSampler = BlockSampler(0, "sender_0")
+
+    gauss: List[float] = [sampler.gauss() for _ in range(20000)]
+    uniform: List[float] = [sampler.uniform() for _ in range(20000)]
+
+    assert abs(statistics.fmean(gauss)) < 0.05
+    assert abs(statistics.stdev(gauss) - 1.0) < 0.05
+    assert all(0.0 <= u < 1.0 for u in uniform)
+    assert abs(statistics.fmean(uniform) - 0.5) < 0.01
+    assert abs(statistics.variance(uniform) - 1.0 / 12.0) < 0.005
@@ -0,0 +1,188 @@
+import ctypes
+import multiprocessing as mp
+import queue
+import socket
+import time
+from typing import Dict
+from typing import List
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from sms_simulation.constants import PRIORITY_NAMES
+from sms_simulation.constants import SENTINEL
+from sms_simulation.fleet import SenderProfiles
+from sms_simulation.lanes import MessageLanes
+from sms_simulation.pool import SmsSenderPool
+from sms_simulation.sender import RateLimiter
+from sms_simulation.sender import SmsSender
+from sms_simulation.sender import take_batch
+
+
+# ============================================
+#               test_take_batch
+# ============================================
+@given(
+    st.integers(min_value=0, max_value=20),
+    st.integers(min_value=1, max_value=10),
+    st.booleans(),
+)
+def test_take_batch(nWaiting: int, batchSize: int, withSentinel: bool) -> None:
+    waiting: queue.Queue = queue.Queue()
+    for i in range(nWaiting):
+        waiting.put({"id": i})
+    if withSentinel:
+        waiting.put(SENTINEL)
+
+    batch: List[Dict[str, int]]
+    batch, sawSentinel = take_batch({"id": -1}, waiting.get_nowait, batchSize)
+
+    expectedSize: int = min(batchSize, nWaiting + 1)
+
+    assert batch == [{"id": i} for i in range(-1, expectedSize - 1)]
+    assert sawSentinel == (withSentinel and nWaiting + 1 < batchSize)
+
+
+# ============================================
+#              test_rate_limiter
+# ============================================
+def test_rate_limiter() -> None:
+    limiter: RateLimiter = RateLimiter(20.0)
+
+    startTime: float = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    limiter.wait(2)
+    limiter.wait()
+
+    # Seven sends at 20 per second, the first of which goes straight away
+    assert time.monotonic() - startTime >= 6 / 20.0
+
+
+# ============================================
+#             test_send_errors
+# ============================================
+@pytest.mark.parametrize("backend", ["process", "thread"])
+def test_send_errors(backend: str) -> None:
+    # Nothing is listening on the port, so every send raises
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        gatewayPort: ctypes.c_int = mp.RawValue("i", sock.getsockname()[1])
+
+    nMessages: int = 6
+    msgQueue: MessageLanes = MessageLanes(
+        [mp.Queue() for _ in PRIORITY_NAMES], [0.0, 1.0, 0.0]
+    )
+    responseQueue: mp.Queue = mp.Queue()
+    profiles: SenderProfiles = SenderProfiles.from_lists([0.01, 0.01], [0.0, 0.0])
+
+    for i in range(nMessages):
+        msgQueue.put_nowait(
+            {"id": i, "priority": 1, "enqueuedAt": time.time(), "to": "", "body": ""}
+        )
+
+    senders: List[mp.Process] = (
+        [
+            SmsSenderPool(
+                profiles,
+                range(2),
+                msgQueue,
+                responseQueue,
+                "worker_0",
+                gatewayPort=gatewayPort,
+            )
+        ]
+        if backend == "thread"
+        else [
+            SmsSender(
+                profiles[i],
+                msgQueue,
+                responseQueue,
+                f"sender_{i}",
+                gatewayPort=gatewayPort,
+            )
+            for i in range(2)
+        ]
+    )
+    for sender in senders:
+        sender.start()
+
+    responses: List[Dict[str, str | float | bool]] = [
+        responseQueue.get(timeout=10.0) for _ in range(nMessages)
+    ]
+
+    for _ in senders:
+        msgQueue.put_nowait(SENTINEL)
+    for sender in senders:
+        sender.join(timeout=10.0)
+
+    # The senders report the failures and stay up to the end
+    assert sorted(r["id"] for r in responses) == list(range(nMessages))
+    assert not any(r["successful"] for r in responses)
+    assert all(sender.exitcode == 0 for sender in senders)
+
+
+# ============================================
+#         test_pool_priority_overtakes
+# ============================================
+def test_pool_priority_overtakes() -> None:
+    nSenders: int = 20
+    nBulk: int = 200
+    nUrgent: int = 5
+    sendTime: float = 0.1
+    msgQueue: MessageLanes = MessageLanes(
+        [mp.Queue() for _ in PRIORITY_NAMES], [1.0, 0.0, 1.0]
+    )
+    responseQueue: mp.Queue = mp.Queue()
+    profiles: SenderProfiles = SenderProfiles(
+        [
+            {
+                "count": nSenders,
+                "distribution": "constant",
+                "mean": sendTime,
+                "failureRate": 0.0,
+            }
+        ]
+    )
+    pool: SmsSenderPool = SmsSenderPool(
+        profiles, range(nSenders), msgQueue, responseQueue, "worker_0"
+    )
+    enqueuedAt: Dict[int, float] = {}
+
+    def put(msgId: int, priority: int) -> None:
+        enqueuedAt[msgId] = time.time()
+        msgQueue.put_nowait(
+            {
+                "id": msgId,
+                "priority": priority,
+                "enqueuedAt": enqueuedAt[msgId],
+                "to": "",
+                "body": "",
+            }
+        )
+
+    for i in range(nBulk):
+        put(i, 2)
+    pool.start()
+
+    # Once the senders are busy with the backlog, urgent messages arrive
+    responses: List[Dict[str, str | float | bool]] = [responseQueue.get(timeout=10.0)]
+    urgentTime: float = time.time()
+    for i in range(nBulk, nBulk + nUrgent):
+        put(i, 0)
+
+    responses += [responseQueue.get(timeout=10.0) for _ in range(nBulk + nUrgent - 1)]
+    msgQueue.put_nowait(SENTINEL)
+    pool.join(timeout=10.0)
+
+    # When each message started to be sent
+    startTimes: Dict[int, float] = {
+        r["id"]: enqueuedAt[r["id"]] + r["queueWait"] for r in responses
+    }
+    lastUrgentStart: float = max(startTimes[i] for i in range(nBulk, nBulk + nUrgent))
+
+    # The urgent messages should go out as soon as senders free up, rather
+    # than after a pool's worth of backlog taken ahead of time
+    assert lastUrgentStart - urgentTime < sendTime / 2.0
+    assert pool.exitcode == 0
@@ -0,0 +1,66 @@
+import argparse
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+from typing import List
+
+import pytest
+
+from sms_simulation.args import _get_parser
+from sms_simulation.args import _validate_args
+from sms_simulation.monitor import SmsMonitor
+from sms_simulation.shutdown import ShutdownCoordinator
+
+
+# ============================================
+#       test_stop_processes_in_parallel
+# ============================================
+def test_stop_processes_in_parallel() -> None:
+    procs: List[mp.Process] = [
+        mp.Process(target=time.sleep, args=(60,), name=f"stuck_{i}") for i in range(10)
+    ]
+    for proc in procs:
+        proc.start()
+
+    coordinator: ShutdownCoordinator = ShutdownCoordinator("drain", 0.5)
+
+    startTime: float = time.monotonic()
+    returnValue: int = coordinator.stop_processes(procs)
+
+    # One deadline for all of the processes rather than one per process
+    assert time.monotonic() - startTime < 3.0
+    assert returnValue == -1
+    assert all(proc.exitcode is not None for proc in procs)
+
+
+# ============================================
+#            test_monitor_interrupt
+# ============================================
+@pytest.mark.parametrize("policy", ["drain", "abort"])
+def test_monitor_interrupt(policy: str) -> None:
+    parser = _get_parser()
+    args: argparse.Namespace = parser.parse_args([])
+
+    args.nMessages = 100
+    args.nSenders = 2
+    args.timeToSend = [0.5]
+    args.onInterrupt = policy
+    args.progUpdateTime = 0.1
+
+    args = _validate_args(args, parser)
+
+    monitor: SmsMonitor = SmsMonitor(args)
+
+    timer: threading.Timer = threading.Timer(
+        1.0, os.kill, args=(os.getpid(), signal.SIGINT)
+    )
+    timer.start()
+
+    startTime: float = time.monotonic()
+    returnValue: int = monitor.run(60.0)
+
+    assert returnValue != 0
+    assert time.monotonic() - startTime < 10.0
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
@@ -0,0 +1,64 @@
+import math
+from typing import List
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from sms_simulation.fleet import SenderProfiles
+from sms_simulation.throughput import estimate_deadline
+from sms_simulation.throughput import estimate_stall_timeout
+from sms_simulation.throughput import ThroughputEstimator
+
+
+# ============================================
+#         test_estimator_steady_rate
+# ============================================
+@given(st.floats(min_value=0.1, max_value=1000.0))
+def test_estimator_steady_rate(rate: float) -> None:
+    estimator: ThroughputEstimator = ThroughputEstimator(sampleTime=0.5)
+
+    assert math.isnan(estimator.rate)
+    assert math.isnan(estimator.eta(10.0))
+
+    for i in range(20):
+        estimator.update(rate * i * 0.5, i * 0.5)
+
+    assert estimator.rate == pytest.approx(rate)
+    assert estimator.eta(rate) == pytest.approx(1.0)
+
+
+# ============================================
+#       test_estimator_ignores_close_samples
+# ============================================
+def test_estimator_ignores_close_samples() -> None:
+    estimator: ThroughputEstimator = ThroughputEstimator(sampleTime=1.0)
+
+    estimator.update(0.0, 0.0)
+    estimator.update(100.0, 0.1)
+    assert math.isnan(estimator.rate)
+
+    estimator.update(100.0, 1.0)
+    assert estimator.rate == pytest.approx(100.0)
+
+
+# ============================================
+#            test_estimate_deadline
+# ============================================
+@given(
+    st.integers(min_value=1, max_value=10000),
+    st.lists(st.floats(min_value=0.01, max_value=10.0), min_size=1, max_size=50),
+)
+def test_estimate_deadline(nMessages: int, timeToSend: List[float]) -> None:
+    profiles: SenderProfiles = SenderProfiles.from_lists(
+        timeToSend, [0.1] * len(timeToSend)
+    )
+    doubled: SenderProfiles = SenderProfiles.from_lists(
+        timeToSend + timeToSend, [0.1] * (2 * len(timeToSend))
+    )
+    deadline: float = estimate_deadline(nMessages, profiles)
+
+    # More messages take longer and more senders finish sooner
+    assert deadline > estimate_deadline(nMessages, doubled)
+    assert deadline < estimate_deadline(2 * nMessages, profiles)
+    assert estimate_stall_timeout(profiles) > max(timeToSend)
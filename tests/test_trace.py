@@ -0,0 +1,131 @@
+import argparse
+import gzip
+import os
+from typing import Dict
+from typing import List
+
+import pytest
+
+from sms_simulation.args import _get_parser
+from sms_simulation.args import _validate_args
+from sms_simulation.monitor import SmsMonitor
+from sms_simulation.throughput import estimate_deadline
+from sms_simulation.trace import join_trace_parts
+from sms_simulation.trace import read_trace
+from sms_simulation.trace import TraceWriter
+
+
+# ============================================
+#            test_trace_round_trip
+# ============================================
+def test_trace_round_trip(tmp_path) -> None:
+    path: str = str(tmp_path / "run.trace")
+    parts: List[str] = [f"{path}.responses", f"{path}.messages"]
+
+    responses: TraceWriter = TraceWriter(parts[0], 100.0)
+    responses.write_header({"nSenders": 2})
+    responses.write_response(
+        {"id": 0, "sender": "sender_1", "timeToSend": 0.25, "successful": False}
+    )
+    responses.close()
+
+    messages: TraceWriter = TraceWriter(parts[1], 100.0)
+    messages.write_message(
+        {
+            "id": 0,
+            "to": "555-555-5555",
+            "body": "hi",
+            "priority": 2,
+            "enqueuedAt": 101.5,
+        }
+    )
+    messages.close()
+
+    join_trace_parts(path, parts)
+
+    header, messageRecords, responseRecords = read_trace(path)
+
+    assert header["nSenders"] == 2
+    assert header["startTime"] == 100.0
+    assert messageRecords == [["m", 0, 2, 1.5, "555-555-5555", "hi"]]
+    assert responseRecords == [["r", 0, "sender_1", 0.25, False]]
+    assert not any(os.path.exists(part) for part in parts)
+
+
+# ============================================
+#            test_trace_truncated
+# ============================================
+def test_trace_truncated(tmp_path) -> None:
+    path: str = str(tmp_path / "run.trace")
+
+    writer: TraceWriter = TraceWriter(path, 0.0)
+    writer.write_header({})
+    for i in range(100):
+        writer.write_response(
+            {"id": i, "sender": "sender_0", "timeToSend": 0.1, "successful": True}
+        )
+    writer.close()
+
+    # Cut the gzip stream short, as an aborted producer would
+    with open(path, "rb") as trace:
+        data: bytes = trace.read()
+    with open(path, "wb") as trace:
+        trace.write(data[: len(data) - 8])
+
+    _, _, responses = read_trace(path)
+
+    assert len(responses) == 100
+
+
+# ============================================
+#              test_trace_invalid
+# ============================================
+def test_trace_invalid(tmp_path) -> None:
+    path: str = str(tmp_path / "run.trace")
+
+    with gzip.open(path, "wt") as trace:
+        trace.write('{"version": 0}\n')
+
+    with pytest.raises(ValueError):
+        read_trace(path)
+
+
+# ============================================
+#             test_record_replay
+# ============================================
+@pytest.mark.parametrize("transport", ["sleep", "http"])
+def test_record_replay(tmp_path, transport: str) -> None:
+    path: str = str(tmp_path / "run.trace")
+    parser = _get_parser()
+
+    args: argparse.Namespace = parser.parse_args(
+        ["-n", "20", "-s", "3", "-t", "0.05", "-f", "0.5", "--record", path]
+    )
+    args.progUpdateTime = 0.1
+    args = _validate_args(args, parser)
+
+    recorded: SmsMonitor = SmsMonitor(args)
+    assert recorded.run(estimate_deadline(args.nMessages, args.profiles)) == 0
+
+    _, messages, responses = read_trace(path)
+    assert len(messages) == len(responses) == 20
+
+    args = parser.parse_args(
+        ["--replay", path, "--replay-speed", "2", "--transport", transport]
+    )
+    args.progUpdateTime = 0.1
+    args = _validate_args(args, parser)
+
+    assert args.nMessages == 20
+    assert args.nSenders == 3
+
+    replayed: SmsMonitor = SmsMonitor(args)
+    assert replayed.run(estimate_deadline(args.nMessages, args.profiles)) == 0
+
+    # The replay sends the same messages with the same outcomes
+    expected: Dict[str, float] = {
+        "failedSends": sum(not record[4] for record in responses),
+        "totalSendTime": sum(record[3] for record in responses) / 2,
+    }
+    assert replayed._state["failedSends"] == expected["failedSends"]
+    assert replayed._state["totalSendTime"] == pytest.approx(expected["totalSendTime"])